@@ -0,0 +1,28 @@
+"""contacts owner_id, id index
+
+Revision ID: 4f9ce229ee17
+Revises: 610a84c8cc59
+Create Date: 2026-10-18 10:12:41.317204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f9ce229ee17'
+down_revision: Union[str, Sequence[str], None] = '610a84c8cc59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_contacts_owner_id_id', 'contacts', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_owner_id_id', table_name='contacts')
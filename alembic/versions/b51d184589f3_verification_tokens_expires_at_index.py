@@ -0,0 +1,29 @@
+"""verification tokens expires_at index
+
+Revision ID: b51d184589f3
+Revises: e7284696e089
+Create Date: 2026-10-18 14:02:41.318904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b51d184589f3'
+down_revision: Union[str, Sequence[str], None] = 'e7284696e089'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lets the purge job find expired rows without scanning the table.
+    op.create_index(op.f('ix_verification_tokens_expires_at'), 'verification_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_verification_tokens_expires_at'), table_name='verification_tokens')
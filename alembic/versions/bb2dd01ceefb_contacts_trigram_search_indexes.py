@@ -0,0 +1,36 @@
+"""contacts trigram search indexes
+
+Revision ID: bb2dd01ceefb
+Revises: 4f9ce229ee17
+Create Date: 2026-10-18 11:02:15.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb2dd01ceefb'
+down_revision: Union[str, Sequence[str], None] = '4f9ce229ee17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_contacts_{column}_trgm', 'contacts', [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in TRIGRAM_COLUMNS:
+        op.drop_index(f'ix_contacts_{column}_trgm', table_name='contacts')
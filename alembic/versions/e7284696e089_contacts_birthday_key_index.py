@@ -0,0 +1,33 @@
+"""contacts birthday key index
+
+Revision ID: e7284696e089
+Revises: bb2dd01ceefb
+Create Date: 2026-10-18 11:48:03.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7284696e089'
+down_revision: Union[str, Sequence[str], None] = 'bb2dd01ceefb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Must stay in sync with models.contact_birthday_key.
+    op.create_index(
+        'ix_contacts_owner_birthday_key', 'contacts',
+        ['owner_id', sa.text('(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday))')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_owner_birthday_key', table_name='contacts')
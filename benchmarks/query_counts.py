@@ -0,0 +1,120 @@
+"""Check how many SQL statements each contact write endpoint sends to the database.
+
+Like ``benchmarks.run`` it needs no services by default: the app gets a throwaway SQLite
+database, fakeredis and placeholder values for any required setting missing from the
+environment and .env:
+
+    python -m benchmarks.query_counts
+    python -m benchmarks.query_counts --database-url postgresql+asyncpg://.../scratch --real-redis
+
+Each write is expected to cost exactly one statement (the INSERT/UPDATE/DELETE ... RETURNING);
+the current user comes from the user cache, which is warmed before counting. The script exits
+with status 1 if any endpoint exceeds its budget.
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+import httpx
+from sqlalchemy import delete
+
+from benchmarks.run import configure_environment
+
+
+def contact_payload(tag: str) -> dict:
+    return {
+        "first_name": "Query",
+        "last_name": "Count",
+        "email": f"qc-{tag}-{uuid.uuid4().hex[:8]}@example.com",
+        "phone_number": "+380000000000",
+        "birthday": "1990-05-17",
+    }
+
+
+async def create_owner():
+    from src.database import models
+    from src.database.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        owner = models.User(email=f"qc-{uuid.uuid4().hex[:8]}@example.com", hashed_password="!", is_verified=True)
+        db.add(owner)
+        await db.commit()
+        return owner
+
+
+async def remove_owner(owner_id: int) -> None:
+    from src.database import models
+    from src.database.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(models.Contact).where(models.Contact.owner_id == owner_id))
+        await db.execute(delete(models.User).where(models.User.id == owner_id))
+        await db.commit()
+
+
+async def measure(client: httpx.AsyncClient, name: str, budget: int, method: str, url: str, **kwargs):
+    from src.database.db import engine
+    from src.database.query_counter import count_queries
+
+    with count_queries(engine) as counter:
+        response = await client.request(method, url, **kwargs)
+    response.raise_for_status()
+    verdict = "ok" if counter.count <= budget else "OVER BUDGET"
+    print(f"{name:<28} {counter.count:>3} statements (budget {budget})  {verdict}")
+    for statement in counter.statements:
+        print(f"    {' '.join(statement.split())[:110]}")
+    return response, counter.count <= budget
+
+
+async def check() -> int:
+    from src.auth.auth import create_access_token
+    from src.main import app
+
+    async with app.router.lifespan_context(app):
+        owner = await create_owner()
+        token = create_access_token({"sub": owner.email})
+        transport = httpx.ASGITransport(app=app)
+        results = []
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                         headers={"Authorization": f"Bearer {token}"}) as client:
+                # Loads the owner into the user cache so the writes below are measured alone.
+                (await client.get("/contacts/", params={"limit": 1})).raise_for_status()
+
+                created = []
+                for tag in ("a", "b", "c"):
+                    response, ok = await measure(client, f"POST /contacts/ ({tag})", 1, "POST", "/contacts/",
+                                                 json=contact_payload(tag))
+                    created.append(response.json()["id"])
+                    results.append(ok)
+                first, second, third = created
+
+                _, ok = await measure(client, "PUT /contacts/{id}", 1, "PUT", f"/contacts/{first}",
+                                      json=contact_payload("put"))
+                results.append(ok)
+                _, ok = await measure(client, "PATCH /contacts/batch", 1, "PATCH", "/contacts/batch",
+                                      json={"ids": created, "changes": {"extra_info": "patched"}})
+                results.append(ok)
+                _, ok = await measure(client, "DELETE /contacts/{id}", 1, "DELETE", f"/contacts/{first}")
+                results.append(ok)
+                _, ok = await measure(client, "DELETE /contacts/batch", 1, "DELETE", "/contacts/batch",
+                                      json={"ids": [second, third]})
+                results.append(ok)
+        finally:
+            await remove_owner(owner.id)
+    return 0 if all(results) else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="scratch database; defaults to a temporary SQLite file")
+    parser.add_argument("--real-redis", action="store_true", help="use the configured Redis instead of fakeredis")
+    args = parser.parse_args()
+    # Before anything under src/ is imported, as in benchmarks.run.
+    configure_environment(args.database_url, args.real_redis)
+    return asyncio.run(check())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
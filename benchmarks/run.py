@@ -0,0 +1,433 @@
+"""Latency and throughput benchmarks for the Contacts API.
+
+The FastAPI app from ``src.main`` runs in-process behind httpx's ASGI transport. By default it
+uses a throwaway SQLite database and fakeredis, so a run needs no services:
+
+    python -m benchmarks.run --requests 500 --concurrency 10 --output before.json
+    python -m benchmarks.run --database-url postgresql+asyncpg://.../scratch --real-redis
+    python -m benchmarks.run --compare before.json after.json
+
+Every scenario reports p50/p95/p99/mean/max latency, throughput and SQL statements per request.
+Results are written as JSON together with the commit they were measured on. ``--compare``
+(or ``--baseline`` during a run) prints the change per scenario and exits with status 1 when
+p95 latency or throughput regresses by more than ``--threshold``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+ENV_FILE = ROOT / ".env"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+BENCH_PASSWORD = "bench-password"
+FIRST_NAMES = ["Anna", "James", "Maria", "John", "Olena", "Taras", "Sofia", "Mark", "Lee", "Ivan"]
+LAST_NAMES = ["Smith", "Johnson", "Lee", "Brown", "Koval", "Shevchenko", "Martin", "Garcia"]
+SEARCH_TERMS = ["anna", "smi", "son", "ja", "ko", "mar lee", "zzqx"]
+
+# Settings the app refuses to start without; only used when neither the environment nor .env
+# provides them. None of them is contacted during a run.
+PLACEHOLDER_SETTINGS = {
+    "SECRET_KEY": "benchmark-secret",
+    "REFRESH_SECRET_KEY": "benchmark-refresh-secret",
+    "BASE_URL": "http://localhost:8000",
+    "CLOUDINARY_NAME": "benchmark",
+    "CLOUDINARY_API_KEY": "benchmark",
+    "CLOUDINARY_API_SECRET": "benchmark",
+    "MAIL_USERNAME": "benchmark",
+    "MAIL_PASSWORD": "benchmark",
+    "MAIL_FROM": "benchmark@example.com",
+    "MAIL_PORT": "1025",
+    "MAIL_SERVER": "localhost",
+    "MAIL_STARTTLS": "false",
+    "MAIL_SSL": "false",
+    "REDIS_HOST": "localhost",
+}
+
+SCENARIOS = [
+    "login",
+    "token_refresh",
+    "current_user",
+    "current_user_uncached",
+    "contacts_create",
+    "contacts_read",
+    "contacts_update",
+    "contacts_list",
+    "contacts_search",
+    "birthdays",
+    "contacts_delete",
+]
+
+
+def configure_environment(database_url, real_redis: bool) -> str:
+    # Must run before anything under src/ is imported: settings, engine and Redis client are
+    # created at import time.
+    from dotenv import dotenv_values
+
+    configured = {key.upper() for key in dotenv_values(ENV_FILE)} if ENV_FILE.exists() else set()
+    for key, value in PLACEHOLDER_SETTINGS.items():
+        if key not in os.environ and key not in configured:
+            os.environ[key] = value
+    if database_url is None:
+        database_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='contacts-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    # Rate limits would turn a load test into a 429 test; every request here has the same IP.
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    if not real_redis:
+        import fakeredis
+        import redis.asyncio
+
+        fake = fakeredis.FakeAsyncRedis(decode_responses=True)
+        redis.asyncio.from_url = lambda *args, **kwargs: fake
+    return database_url
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    # Nearest-rank percentile; stable for the small sample sizes used here.
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors: int, wall_seconds: float, statements: int, concurrency: int) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        "statements_per_request": round(statements / count, 3) if count else 0.0,
+    }
+
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+class Bench:
+    """Seeded owner, data and HTTP client shared by all scenarios of one run."""
+
+    def __init__(self, client, owner, token: str, contact_ids, seed: int):
+        self.client = client
+        self.owner = owner
+        self.token = token
+        self.contact_ids = contact_ids
+        self.created_ids = []
+        self.random = random.Random(seed)
+        self.counter = itertools.count()
+
+    def contact_payload(self) -> dict:
+        n = next(self.counter)
+        return {
+            "first_name": self.random.choice(FIRST_NAMES),
+            "last_name": self.random.choice(LAST_NAMES),
+            "email": f"bench-{self.owner.id}-{n}@example.com",
+            "phone_number": f"+380{n:09d}",
+            "birthday": (date(1960, 1, 1) + timedelta(days=self.random.randrange(20000))).isoformat(),
+        }
+
+
+async def seed(contacts: int, seed_value: int):
+    from sqlalchemy import select
+
+    from src.database import models
+    from src.database.db import AsyncSessionLocal
+    from src.repository import contacts as repository_contacts
+    from src.schemas.contact import ContactCreate
+    from src.services.passwords import password_hasher
+
+    rng = random.Random(seed_value)
+    async with AsyncSessionLocal() as db:
+        owner = models.User(email=f"bench-{uuid.uuid4().hex[:10]}@example.com",
+                            hashed_password=await password_hasher.hash(BENCH_PASSWORD), is_verified=True)
+        db.add(owner)
+        await db.commit()
+        batch = []
+        for n in range(contacts):
+            batch.append(ContactCreate(
+                first_name=f"{rng.choice(FIRST_NAMES)}{n % 97}",
+                last_name=f"{rng.choice(LAST_NAMES)}{n % 89}",
+                email=f"seed-{owner.id}-{n}@example.com",
+                phone_number=f"+381{n:09d}",
+                birthday=date(1960, 1, 1) + timedelta(days=rng.randrange(20000)),
+            ))
+            if len(batch) == 1000 or n == contacts - 1:
+                await repository_contacts.bulk_insert_contacts(db, batch, owner.id)
+                await db.commit()
+                batch = []
+        ids = (await db.execute(
+            select(models.Contact.id).where(models.Contact.owner_id == owner.id).order_by(models.Contact.id)
+        )).scalars().all()
+    return owner, list(ids)
+
+
+async def cleanup(owner_id: int) -> None:
+    from sqlalchemy import delete
+
+    from src.database import models
+    from src.database.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(models.Contact).where(models.Contact.owner_id == owner_id))
+        await db.execute(delete(models.User).where(models.User.id == owner_id))
+        await db.commit()
+
+
+async def build_scenarios(bench: Bench, sessions: int) -> dict:
+    from src.auth import tokens
+    from src.auth.auth import create_access_token, get_current_user, token_claims
+    from src.cache.user_cache import invalidate_user
+    from src.database.db import AsyncSessionLocal
+    from src.services.pagination import AFTER, encode_cursor
+
+    client = bench.client
+    auth = {"Authorization": f"Bearer {bench.token}"}
+    legacy_token = create_access_token({"sub": bench.owner.email})
+    refresh_tokens = asyncio.Queue()
+    for _ in range(sessions):
+        refresh_tokens.put_nowait((await tokens.start_session(token_claims(bench.owner)))[1])
+
+    async def login():
+        return await client.post("/auth/login", json={"email": bench.owner.email, "password": BENCH_PASSWORD})
+
+    async def token_refresh():
+        # Each in-flight request rotates its own session; sharing one would look like token reuse.
+        refresh_token = await refresh_tokens.get()
+        response = await client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        if response.status_code == 200:
+            refresh_token = response.json()["refresh_token"]
+        refresh_tokens.put_nowait(refresh_token)
+        return response
+
+    async def current_user():
+        async with AsyncSessionLocal() as db:
+            await get_current_user(token=bench.token, db=db)
+
+    async def current_user_uncached():
+        # A token without uid/verified claims takes the lookup path; the cache is emptied first.
+        await invalidate_user(bench.owner.email)
+        async with AsyncSessionLocal() as db:
+            await get_current_user(token=legacy_token, db=db)
+
+    async def contacts_create():
+        response = await client.post("/contacts/", json=bench.contact_payload(), headers=auth)
+        if response.status_code == 201:
+            bench.created_ids.append(response.json()["id"])
+        return response
+
+    async def contacts_read():
+        return await client.get(f"/contacts/{bench.random.choice(bench.contact_ids)}", headers=auth)
+
+    async def contacts_update():
+        payload = bench.contact_payload()
+        return await client.put(f"/contacts/{bench.random.choice(bench.contact_ids)}", json=payload, headers=auth)
+
+    async def contacts_list():
+        cursor = encode_cursor(bench.owner.id, bench.random.choice(bench.contact_ids), AFTER)
+        return await client.get("/contacts/", params={"cursor": cursor, "limit": 50}, headers=auth)
+
+    async def contacts_search():
+        return await client.get("/contacts/search/", params={"query": bench.random.choice(SEARCH_TERMS)}, headers=auth)
+
+    async def birthdays():
+        return await client.get("/contacts/birthdays/upcoming", params={"days": 30}, headers=auth)
+
+    async def contacts_delete():
+        # Deletes what contacts_create made, so the seeded data stays the same for later runs.
+        if not bench.created_ids:
+            return None
+        return await client.delete(f"/contacts/{bench.created_ids.pop()}", headers=auth)
+
+    return {
+        "login": login,
+        "token_refresh": token_refresh,
+        "current_user": current_user,
+        "current_user_uncached": current_user_uncached,
+        "contacts_create": contacts_create,
+        "contacts_read": contacts_read,
+        "contacts_update": contacts_update,
+        "contacts_list": contacts_list,
+        "contacts_search": contacts_search,
+        "birthdays": birthdays,
+        "contacts_delete": contacts_delete,
+    }
+
+
+async def run_scenario(call, requests: int, concurrency: int, warmup: int) -> dict:
+    from src.database.db import engine
+    from src.database.query_counter import count_queries
+
+    for _ in range(warmup):
+        await call()
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await call()
+                failed = response is not None and response.status_code >= 400
+            except Exception as e:
+                print(f"  request failed: {e!r}")
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    with count_queries(engine) as counter:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+    return summarize(latencies, errors, wall, counter.count, concurrency)
+
+
+async def benchmark(args, database_url: str) -> dict:
+    import httpx
+
+    from src.auth.auth import create_access_token, token_claims
+    from src.database.db import engine
+    from src.main import app
+
+    selected = args.scenarios.split(",") if args.scenarios else SCENARIOS
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        owner, contact_ids = await seed(args.contacts, args.seed)
+        token = create_access_token(token_claims(owner))
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                bench = Bench(client, owner, token, contact_ids, args.seed)
+                scenarios = await build_scenarios(bench, args.concurrency)
+                for name in SCENARIOS:
+                    if name not in selected:
+                        continue
+                    # bcrypt is deliberately slow; a tenth of the requests is enough to see it.
+                    requests = max(1, args.requests // 10) if name == "login" else args.requests
+                    results[name] = await run_scenario(scenarios[name], requests, args.concurrency, args.warmup)
+                    print(format_row(name, results[name]))
+        finally:
+            await cleanup(owner.id)
+    await engine.dispose()
+
+    return {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "redis": "redis" if args.real_redis else "fakeredis",
+            "contacts": args.contacts,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+HEADER = f"{'scenario':<24}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'stmts':>7}"
+
+
+def format_row(name: str, result: dict) -> str:
+    return (f"{name:<24}{result['requests']:>6}{result['errors']:>5}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['throughput_rps']:>10.1f}"
+            f"{result['statements_per_request']:>7.2f}")
+
+
+def compare(before: dict, after: dict, threshold: float) -> bool:
+    # Returns True when any scenario present in both runs regressed beyond the threshold.
+    for key in ("database", "redis", "contacts", "concurrency"):
+        if before["meta"].get(key) != after["meta"].get(key):
+            print(f"note: runs differ in {key}: {before['meta'].get(key)} vs {after['meta'].get(key)}")
+    print(f"{'scenario':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'req/s':>10}{'stmts':>12}")
+    regressed = False
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            continue
+
+        def change(key):
+            return (new[key] - old[key]) / old[key] if old[key] else 0.0
+
+        flags = []
+        if change("p95_ms") > threshold:
+            flags.append("p95")
+        if change("throughput_rps") < -threshold:
+            flags.append("throughput")
+        regressed = regressed or bool(flags)
+        statements = f"{old['statements_per_request']:.2f}->{new['statements_per_request']:.2f}"
+        print(f"{name:<24}{change('p50_ms'):>+10.1%}{change('p95_ms'):>+10.1%}{change('p99_ms'):>+10.1%}"
+              f"{change('throughput_rps'):>+10.1%}{statements:>12}  {'REGRESSED: ' + ', '.join(flags) if flags else ''}")
+    return regressed
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--contacts", type=int, default=2000, help="contacts seeded for the benchmark user")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--database-url", help="scratch database; defaults to a temporary SQLite file")
+    parser.add_argument("--real-redis", action="store_true", help="use the configured Redis instead of fakeredis")
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", help="results file to compare this run against")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results files and exit")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        return 1 if compare(load_results(args.compare[0]), load_results(args.compare[1]), args.threshold) else 0
+
+    database_url = configure_environment(args.database_url, args.real_redis)
+    print(HEADER)
+    results = asyncio.run(benchmark(args, database_url))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{(results['meta']['commit'] or 'unknown')[:12]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        return 1 if compare(load_results(args.baseline), results, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Compare the legacy ILIKE contact search with the trigram-backed search engine.
+
+Run against a scratch Postgres database that has been migrated with ``alembic upgrade head``:
+
+    python -m benchmarks.search_benchmark --rows 1000000
+
+The legacy queries run inside a transaction that drops the trigram indexes and is
+rolled back afterwards, so they see the same plan the old code had.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import or_, select, text
+
+from src.database import models
+from src.database.db import AsyncSessionLocal, engine
+from src.repository import contacts as repository_contacts
+
+BENCH_EMAIL = "bench-search@example.com"
+QUERIES = ["anna", "smi", "son", "ja", "exam", "zzqx", "mar lee"]
+TRIGRAM_INDEXES = ("ix_contacts_first_name_trgm", "ix_contacts_last_name_trgm", "ix_contacts_email_trgm")
+
+SEED_SQL = text("""
+    INSERT INTO contacts (first_name, last_name, email, phone, birthday, owner_id)
+    SELECT
+        (ARRAY['Anna','James','Maria','John','Olena','Taras','Sofia','Mark','Lee','Ivan'])[1 + i % 10] || substr(md5(i::text), 1, 4),
+        (ARRAY['Smith','Johnson','Lee','Brown','Koval','Shevchenko','Martin','Garcia'])[1 + i % 8] || substr(md5(i::text), 5, 4),
+        'bench' || i || '@example.com',
+        '+380' || lpad((i % 1000000000)::text, 9, '0'),
+        date '1960-01-01' + (i % 20000),
+        :owner_id
+    FROM generate_series(:start, :stop) AS i
+""")
+
+
+async def ensure_owner_and_rows(rows: int) -> int:
+    async with AsyncSessionLocal() as db:
+        owner = (await db.execute(select(models.User).filter(models.User.email == BENCH_EMAIL))).scalar_one_or_none()
+        if owner is None:
+            owner = models.User(email=BENCH_EMAIL, hashed_password="!", is_verified=True)
+            db.add(owner)
+            await db.commit()
+        existing = (await db.execute(
+            text("SELECT count(*) FROM contacts WHERE owner_id = :owner_id"), {"owner_id": owner.id}
+        )).scalar_one()
+        batch = 100_000
+        for start in range(existing + 1, rows + 1, batch):
+            stop = min(start + batch - 1, rows)
+            await db.execute(SEED_SQL, {"owner_id": owner.id, "start": start, "stop": stop})
+            await db.commit()
+            print(f"seeded {stop}/{rows}")
+        await db.execute(text("ANALYZE contacts"))
+        await db.commit()
+        return owner.id
+
+
+def legacy_statement(query: str, owner_id: int, limit: int):
+    return select(models.Contact).filter(
+        models.Contact.owner_id == owner_id,
+        or_(
+            models.Contact.first_name.ilike(f"%{query}%"),
+            models.Contact.last_name.ilike(f"%{query}%"),
+            models.Contact.email.ilike(f"%{query}%")
+        )
+    ).limit(limit)
+
+
+async def time_legacy(owner_id: int, query: str, repeat: int, limit: int) -> list:
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for name in TRIGRAM_INDEXES:
+            await db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for _ in range(repeat):
+            started = time.perf_counter()
+            (await db.execute(legacy_statement(query, owner_id, limit))).scalars().all()
+            timings.append((time.perf_counter() - started) * 1000)
+        await db.rollback()
+    return timings
+
+
+async def time_engine(owner_id: int, query: str, repeat: int, limit: int) -> list:
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await repository_contacts.search_contacts_page(db, owner_id, query, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main(rows: int, repeat: int, limit: int) -> None:
+    owner_id = await ensure_owner_and_rows(rows)
+    print(f"{'query':<12}{'legacy p50 ms':>16}{'engine p50 ms':>16}{'speedup':>10}")
+    for query in QUERIES:
+        legacy = statistics.median(await time_legacy(owner_id, query, repeat, limit))
+        engine_ms = statistics.median(await time_engine(owner_id, query, repeat, limit))
+        print(f"{query:<12}{legacy:>16.2f}{engine_ms:>16.2f}{legacy / engine_ms:>9.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat, args.limit))
@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'quotes.middleware.AuthorCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'hw_project.urls'
@@ -108,6 +109,12 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+QUOTES_SCRAPE_URL = os.environ.get('QUOTES_SCRAPE_URL', 'http://quotes.toscrape.com')
+QUOTES_SCRAPE_CONCURRENCY = int(os.environ.get('QUOTES_SCRAPE_CONCURRENCY', '8'))
+QUOTES_SCRAPE_TIMEOUT = float(os.environ.get('QUOTES_SCRAPE_TIMEOUT', '10'))
+QUOTES_SCRAPE_RETRIES = int(os.environ.get('QUOTES_SCRAPE_RETRIES', '2'))
+QUOTES_SCRAPE_RETRY_BACKOFF = float(os.environ.get('QUOTES_SCRAPE_RETRY_BACKOFF', '0.5'))
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
@@ -0,0 +1,155 @@
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Author, Quote, Tag
+from .tag_stats import recount_tags
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+AUTHOR_DETAILS = ("born_date", "born_location", "description")
+
+
+def iter_json_array(fd, chunk_size=CHUNK_SIZE):
+    # Yields the items of a top-level JSON array while reading the file in chunks, so memory
+    # stays at one chunk plus one item however large the file is.
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    started = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = fd.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            fill()
+            continue
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buffer) and not eof:
+            # A number at the end of the buffer may continue in the next chunk.
+            fill()
+            continue
+        pos = end
+        yield item
+
+
+def batched(records, size):
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def ingest_authors(records, batch_size=BATCH_SIZE):
+    # New names are inserted; authors that only exist as a bare name (created while importing
+    # quotes) get their details filled in. Returns the number of authors inserted.
+    known = dict(Author.objects.values_list("fullname", "id"))
+    created = 0
+    for batch in batched(records, batch_size):
+        details = {}
+        for record in batch:
+            details.setdefault(record["fullname"], {field: record.get(field) or "" for field in AUTHOR_DETAILS})
+        with transaction.atomic():
+            new = [Author(fullname=name, **fields) for name, fields in details.items() if name not in known]
+            Author.objects.bulk_create(new)
+            known.update((author.fullname, author.id) for author in new)
+            created += len(new)
+            bare = [
+                author for author in Author.objects.filter(fullname__in=list(details), description="")
+                if any(details[author.fullname].values())
+            ]
+            for author in bare:
+                for field, value in details[author.fullname].items():
+                    setattr(author, field, value)
+            Author.objects.bulk_update(bare, AUTHOR_DETAILS)
+    return created
+
+
+def ingest_quotes(records, batch_size=BATCH_SIZE, progress=None):
+    # Records are {"quote": text, "author": fullname, "tags": [names]}. Each batch takes a fixed
+    # number of statements: missing authors and tags are bulk inserted, quotes already stored
+    # for the same author are matched in one query, then new quotes and tag links are bulk
+    # inserted. Re-running the same file inserts nothing. `progress` is called with the running
+    # stats after each committed batch.
+    authors = dict(Author.objects.values_list("fullname", "id"))
+    tags = dict(Tag.objects.values_list("name", "id"))
+    stats = {"authors": 0, "tags": 0, "quotes": 0, "skipped": 0}
+
+    for batch in batched(records, batch_size):
+        with transaction.atomic():
+            stats["authors"] += _create_missing_authors(authors, {record["author"] for record in batch})
+            stats["tags"] += _create_missing_tags(tags, {name for record in batch for name in record.get("tags", [])})
+
+            existing = {
+                (text, author_id): quote_id
+                for quote_id, text, author_id in Quote.objects.filter(
+                    quote__in={record["quote"] for record in batch}
+                ).values_list("id", "quote", "author_id")
+            }
+            new_quotes, links = {}, []
+            for record in batch:
+                key = (record["quote"], authors[record["author"]])
+                if key in existing:
+                    stats["skipped"] += 1
+                    quote = existing[key]
+                elif key in new_quotes:
+                    quote = new_quotes[key]
+                else:
+                    quote = new_quotes[key] = Quote(quote=key[0], author_id=key[1])
+                links.extend((quote, tags[name]) for name in record.get("tags", []))
+            Quote.objects.bulk_create(new_quotes.values())
+            stats["quotes"] += len(new_quotes)
+
+            Quote.tags.through.objects.bulk_create(
+                [
+                    Quote.tags.through(quote_id=getattr(quote, "pk", quote), tag_id=tag_id)
+                    for quote, tag_id in links
+                ],
+                ignore_conflicts=True,
+            )
+            # The join rows were written without m2m_changed, so counters are recomputed here.
+            recount_tags({tag_id for _, tag_id in links})
+        if progress:
+            progress(dict(stats))
+    return stats
+
+
+def _create_missing_authors(authors, names):
+    new = [Author(fullname=name, born_date="", born_location="", description="") for name in names - authors.keys()]
+    Author.objects.bulk_create(new)
+    authors.update((author.fullname, author.id) for author in new)
+    return len(new)
+
+
+def _create_missing_tags(tags, names):
+    missing = names - tags.keys()
+    if not missing:
+        return 0
+    # Another import may insert the same tag meanwhile; ignore_conflicts skips it and the ids
+    # are read back by name.
+    Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+    tags.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+    return len(missing)
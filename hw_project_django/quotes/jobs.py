@@ -0,0 +1,161 @@
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .ingest import BATCH_SIZE, ingest_authors, ingest_quotes, iter_json_array
+from .models import Job
+from .utils import scrape_and_save_quotes
+
+SCRAPE = "scrape"
+IMPORT_QUOTES = "import_quotes"
+
+
+class JobLost(Exception):
+    # The job was requeued and claimed again while this worker was still running it.
+    pass
+
+
+def run_scrape(params, progress=None):
+    return scrape_and_save_quotes(
+        base_url=params.get("base_url"),
+        concurrency=params.get("concurrency"),
+        max_pages=params.get("max_pages"),
+        progress=progress,
+    )
+
+
+def run_import_quotes(params, progress=None):
+    started = time.monotonic()
+    batch_size = params.get("batch_size", BATCH_SIZE)
+    authors_created = 0
+    if params.get("authors_path"):
+        with open(params["authors_path"], encoding="utf-8") as fd:
+            authors_created = ingest_authors(iter_json_array(fd), batch_size=batch_size)
+
+    def summary(stats):
+        stats = {**stats, "authors": stats["authors"] + authors_created}
+        return {"rows_inserted": stats["authors"] + stats["tags"] + stats["quotes"], **stats}
+
+    batch_done = (lambda stats: progress(summary(stats))) if progress else None
+    with open(params["path"], encoding="utf-8") as fd:
+        stats = ingest_quotes(iter_json_array(fd), batch_size=batch_size, progress=batch_done)
+    return {**summary(stats), "duration": round(time.monotonic() - started, 3)}
+
+
+HANDLERS = {
+    SCRAPE: run_scrape,
+    IMPORT_QUOTES: run_import_quotes,
+}
+
+
+def enqueue(kind, params=None, user=None):
+    # Repeated submissions of the same work while it is still waiting share one job. The
+    # partial unique constraint settles concurrent submissions: the loser reads the winner's.
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    params = params or {}
+    queued = Job.objects.filter(kind=kind, params=params, status=Job.Status.QUEUED)
+    job = queued.first()
+    if job is not None:
+        return job
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, params=params, created_by=user)
+    except IntegrityError:
+        job = queued.first()
+        if job is not None:
+            return job
+        # Claimed by a worker in between; this submission queues the next run.
+        return Job.objects.create(kind=kind, params=params, created_by=user)
+
+
+def claim_next():
+    # SKIP LOCKED lets several workers poll the same table without taking the same job.
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.attempt += 1
+        job.save(update_fields=["status", "started_at", "heartbeat_at", "attempt"])
+    return job
+
+
+def _owned(job):
+    # The job's row as long as this worker's claim on it still stands.
+    return Job.objects.filter(id=job.id, status=Job.Status.RUNNING, attempt=job.attempt)
+
+
+def run_job(job):
+    # Running counts are saved as the handler reports them, so the status endpoint shows
+    # progress while the job runs; each save is also the worker's heartbeat. If the job was
+    # requeued and claimed again meanwhile, this run stops and writes nothing more.
+    def progress(stats):
+        job.stats = stats
+        if not _owned(job).update(stats=stats, heartbeat_at=timezone.now()):
+            raise JobLost(job.id)
+
+    try:
+        stats = HANDLERS[job.kind](job.params, progress)
+    except JobLost:
+        job.refresh_from_db()
+        return job
+    except Exception:
+        job.status = Job.Status.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.stats = stats
+    job.finished_at = timezone.now()
+    if not _owned(job).update(status=job.status, stats=job.stats, error=job.error, finished_at=job.finished_at):
+        job.refresh_from_db()
+    return job
+
+
+def requeue_stale(older_than):
+    # Jobs whose worker stopped reporting are picked up again. A job whose work has been
+    # queued again meanwhile cannot be requeued as well and is marked failed instead.
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    stale = Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at=None, started_at__lt=cutoff), status=Job.Status.RUNNING
+    )
+    requeued = 0
+    for job in stale:
+        try:
+            with transaction.atomic():
+                requeued += _owned(job).update(status=Job.Status.QUEUED, started_at=None, heartbeat_at=None)
+        except IntegrityError:
+            _owned(job).update(status=Job.Status.FAILED, error="Stale; the same work was already queued again",
+                               finished_at=timezone.now())
+    return requeued
+
+
+def job_status(job):
+    started, finished = job.started_at, job.finished_at
+    if started is None:
+        duration = None
+    else:
+        duration = round(((finished or timezone.now()) - started).total_seconds(), 3)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "pages_fetched": job.stats.get("pages"),
+        "rows_inserted": job.stats.get("rows_inserted"),
+        "duration": duration,
+        "stats": job.stats,
+        "error": job.error.strip().splitlines()[-1] if job.error else None,
+        "created_at": job.created_at.isoformat(),
+        "started_at": started.isoformat() if started else None,
+        "finished_at": finished.isoformat() if finished else None,
+    }
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from quotes.jobs import claim_next, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued scrape and import jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between polls of an empty queue")
+        parser.add_argument("--stale-after", type=int, default=3600,
+                            help="requeue running jobs that have not reported progress for this many seconds")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale(options["stale_after"])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+        while True:
+            job = claim_next()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+            self.stdout.write(f"Running job {job.id} ({job.kind})")
+            attempt = job.attempt
+            job = run_job(job)
+            if job.attempt != attempt:
+                self.stdout.write(f"Job {job.id} was requeued and taken over by another worker")
+                continue
+            self.stdout.write(f"Job {job.id} {job.status}: {job.stats or job.error}")
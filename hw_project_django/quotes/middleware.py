@@ -0,0 +1,37 @@
+from contextvars import ContextVar
+
+from .models import Author
+
+# Authors already looked up during the current request, keyed by id. None outside a request,
+# where lookups simply go to the database.
+_authors = ContextVar("authors", default=None)
+
+
+class AuthorCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _authors.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _authors.reset(token)
+
+
+def remember_authors(authors):
+    # Lets a view hand over authors it already loaded, e.g. through select_related.
+    cache = _authors.get()
+    if cache is not None:
+        for author in authors:
+            cache[author.id] = author
+
+
+def lookup_author(author_id):
+    cache = _authors.get()
+    if cache is not None and author_id in cache:
+        return cache[author_id]
+    author = Author.objects.filter(id=author_id).first()
+    if cache is not None:
+        cache[author_id] = author
+    return author
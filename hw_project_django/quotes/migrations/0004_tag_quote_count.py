@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_quote_count(apps, schema_editor):
+    Tag = apps.get_model('quotes', 'Tag')
+    Quote = apps.get_model('quotes', 'Quote')
+    counts = (
+        Quote.tags.through.objects.filter(tag=OuterRef('pk'))
+        .order_by()
+        .values('tag')
+        .annotate(total=Count('quote'))
+        .values('total')
+    )
+    Tag.objects.update(quote_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0003_alter_tag_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='quote_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_quote_count, migrations.RunPython.noop),
+    ]
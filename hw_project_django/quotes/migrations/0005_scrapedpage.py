@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0004_tag_quote_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('body', models.TextField()),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -12,6 +12,8 @@ class Author(models.Model):
 
 class Tag(models.Model):
     name = models.CharField(max_length=100, null=False, unique=True)
+    # Maintained by quotes.signals; recount with quotes.tag_stats.recount_tags.
+    quote_count = models.PositiveIntegerField(default=0, db_index=True)
 
 
 
@@ -22,3 +24,43 @@ class Quote(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
+
+
+class ScrapedPage(models.Model):
+    # Validators and body of the last response per URL, replayed on a 304 Not Modified.
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    body = models.TextField()
+    fetched_at = models.DateTimeField(auto_now=True)
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    params = models.JSONField(default=dict, blank=True)
+    stats = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Bumped on every claim; a worker only writes to the job while the attempt is still its own.
+    attempt = models.PositiveIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # The worker polls for the oldest queued job.
+        indexes = [models.Index(fields=["status", "created_at"])]
+        constraints = [
+            # At most one queued job per piece of work, even for concurrent submissions.
+            models.UniqueConstraint(
+                fields=["kind", "params"], condition=models.Q(status="queued"), name="quotes_job_one_queued"
+            ),
+        ]
@@ -0,0 +1,191 @@
+import asyncio
+import re
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup
+
+PAGE_PATTERN = re.compile(r"/page/(\d+)/?$")
+
+
+def parse_quotes_page(html, url):
+    # Returns the quote records, {author page url: author name} and the next page url.
+    soup = BeautifulSoup(html, "html.parser")
+    quotes, authors = [], {}
+    for div in soup.find_all("div", class_="quote"):
+        author = div.find("small", class_="author").get_text(strip=True)
+        quotes.append({
+            "quote": div.find("span", class_="text").get_text(strip=True),
+            "author": author,
+            "tags": [tag.get_text(strip=True) for tag in div.find_all("a", class_="tag")],
+        })
+        about = div.find("a", href=re.compile(r"/author/"))
+        if about:
+            authors[urljoin(url, about["href"])] = author
+    next_link = soup.select_one("li.next > a")
+    return quotes, authors, urljoin(url, next_link["href"]) if next_link else None
+
+
+def parse_author_page(html, fullname):
+    soup = BeautifulSoup(html, "html.parser")
+
+    def text(selector):
+        element = soup.select_one(selector)
+        return element.get_text(strip=True) if element else ""
+
+    return {
+        "fullname": fullname,
+        "born_date": text(".author-born-date"),
+        "born_location": text(".author-born-location"),
+        "description": text(".author-description"),
+    }
+
+
+class QuoteScraper:
+    # Fetches every quotes page and each author page once, with at most `concurrency` requests
+    # in flight over one pooled client. `cache` maps url -> {"etag", "last_modified", "body"}
+    # from the previous run; requests are conditional and a 304 reuses the stored body.
+    # Nothing here touches the database: results are left in `quotes`, `authors` and `fetched`
+    # (responses whose validators should be stored). `progress`, if given, is called with a copy
+    # of `stats` after every page; it runs inside the event loop and must not block.
+    # Transport errors and 5xx/429 answers are retried `retries` times with exponential backoff
+    # from `backoff` seconds; a page that still fails is skipped and listed in `failed_urls`.
+    def __init__(self, base_url, cache=None, concurrency=8, timeout=10, max_pages=None, progress=None,
+                 retries=2, backoff=0.5):
+        self.base_url = base_url
+        self.cache = cache or {}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.progress = progress
+        self.retries = retries
+        self.backoff = backoff
+        self.quotes = []
+        self.authors = {}
+        self.fetched = {}
+        self.stats = {"pages": 0, "author_pages": 0, "not_modified": 0, "errors": 0, "failed_urls": []}
+        self._author_tasks = {}
+
+    async def run(self):
+        self._slots = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True) as client:
+            self._client = client
+            async with asyncio.TaskGroup() as group:
+                self._group = group
+                await self._crawl_pages()
+        return self
+
+    async def _crawl_pages(self):
+        start = urljoin(self.base_url, "/")
+        next_url = self._accept_page(start, await self._fetch(start))
+        number = 1
+        while next_url and (self.max_pages is None or number < self.max_pages):
+            match = PAGE_PATTERN.search(next_url)
+            if not match:
+                # Unknown pagination scheme: follow the links one page at a time. A page that
+                # fails leaves no link to follow, so it ends the crawl (and is listed in
+                # failed_urls).
+                next_url = self._accept_page(next_url, await self._fetch(next_url))
+                number += 1
+                continue
+            # Numbered pages are fetched a window at a time. Results are taken in order up to
+            # the first page without a next link; pages fetched past it are dropped uncounted,
+            # whatever they returned. A page that failed is recorded and the crawl goes on with
+            # the one after it; only a window where every page fails ends the crawl early.
+            number = int(match.group(1))
+            last = number + self.concurrency - 1
+            if self.max_pages is not None:
+                last = min(last, self.max_pages)
+            prefix = next_url[:match.start()]
+            pages = range(number, last + 1)
+            urls = [f"{prefix}/page/{page}/" for page in pages]
+            results = await asyncio.gather(*(self._fetch(url) for url in urls))
+            succeeded = False
+            for page, url, result in zip(pages, urls, results):
+                if result[1]:
+                    self._record(url, result)
+                    next_url = f"{prefix}/page/{page + 1}/"
+                    continue
+                succeeded = True
+                next_url = self._accept_page(url, result)
+                if not next_url:
+                    break
+            if not succeeded:
+                return
+            number = last
+
+    def _accept_page(self, url, result):
+        html = self._record(url, result)
+        if html is None:
+            return None
+        self.stats["pages"] += 1
+        quotes, authors, next_url = parse_quotes_page(html, url)
+        self.quotes.extend(quotes)
+        for author_url, name in authors.items():
+            if author_url not in self._author_tasks:
+                self._author_tasks[author_url] = self._group.create_task(self._author(author_url, name))
+        self._report()
+        return next_url
+
+    async def _author(self, url, name):
+        html = self._record(url, await self._fetch(url))
+        if html is not None:
+            self.stats["author_pages"] += 1
+            self.authors[url] = parse_author_page(html, name)
+            self._report()
+
+    def _report(self):
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    def _record(self, url, result):
+        # Applies a fetch to stats and the validator cache; returns the body or None.
+        response, error = result
+        if error:
+            self.stats["errors"] += 1
+            self.stats["failed_urls"].append(url)
+            print(f"Error fetching {url}: {error}")
+            return None
+        cached = self.cache.get(url)
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return cached["body"]
+        self.fetched[url] = {
+            "etag": response.headers.get("etag", ""),
+            "last_modified": response.headers.get("last-modified", ""),
+            "body": response.text,
+        }
+        return response.text
+
+    async def _fetch(self, url):
+        # Returns (response, error). Nothing is recorded here, so speculative fetches can be
+        # discarded.
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Slept outside the semaphore so waiting retries don't hold a request slot.
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            response, error, retry = await self._request(url)
+            if not retry:
+                break
+        return response, error
+
+    async def _request(self, url):
+        # Returns (response, error, worth retrying).
+        cached = self.cache.get(url)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        async with self._slots:
+            try:
+                response = await self._client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                return None, str(e), True
+        if response.status_code == 304 and cached:
+            return response, None, False
+        if response.status_code != 200:
+            retry = response.status_code >= 500 or response.status_code == 429
+            return None, f"HTTP {response.status_code}", retry
+        return response, None, False
@@ -0,0 +1,45 @@
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+
+from .models import Quote
+from .tag_stats import change_counts
+
+
+@receiver(m2m_changed, sender=Quote.tags.through)
+def update_tag_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add":
+        # post_add only reports the links that were actually created, so re-adding is a no-op.
+        if reverse:
+            change_counts([instance.pk], len(pk_set))
+        else:
+            change_counts(pk_set, 1)
+    elif action == "pre_remove":
+        # remove() reports every pk it was given, linked or not; keep only the linked ones.
+        if reverse:
+            linked = sender.objects.filter(tag=instance.pk, quote__in=pk_set).values_list("quote", flat=True)
+        else:
+            linked = sender.objects.filter(quote=instance.pk, tag__in=pk_set).values_list("tag", flat=True)
+        instance._removed_pks = list(linked)
+    elif action == "post_remove":
+        removed = instance.__dict__.pop("_removed_pks", [])
+        if reverse:
+            change_counts([instance.pk], -len(removed))
+        else:
+            change_counts(removed, -1)
+    elif action == "pre_clear":
+        # clear() does not report what it removes; look it up before the rows are gone.
+        if reverse:
+            instance._cleared_count = instance.quote_set.count()
+        else:
+            instance._cleared_tag_ids = list(instance.tags.values_list("pk", flat=True))
+    elif action == "post_clear":
+        if reverse:
+            change_counts([instance.pk], -instance.__dict__.pop("_cleared_count", 0))
+        else:
+            change_counts(instance.__dict__.pop("_cleared_tag_ids", []), -1)
+
+
+@receiver(pre_delete, sender=Quote)
+def release_tag_counts(sender, instance, **kwargs):
+    # Deleting a quote removes its join rows without an m2m_changed signal.
+    change_counts(list(instance.tags.values_list("pk", flat=True)), -1)
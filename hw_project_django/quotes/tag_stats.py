@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Quote, Tag
+
+TOP_TAGS_CACHE_KEY = "quotes:top_tags"
+TOP_TAGS_CACHE_SIZE = 50
+TOP_TAGS_TIMEOUT = 60 * 60
+
+
+def top_tags(limit=10):
+    # The largest list any page asks for is cached once; smaller lists are slices of it.
+    tags = cache.get(TOP_TAGS_CACHE_KEY)
+    if tags is None:
+        tags = list(
+            Tag.objects.filter(quote_count__gt=0)
+            .order_by("-quote_count", "name")
+            .values("name", "quote_count")[:TOP_TAGS_CACHE_SIZE]
+        )
+        cache.set(TOP_TAGS_CACHE_KEY, tags, TOP_TAGS_TIMEOUT)
+    return tags[:limit]
+
+
+def invalidate_top_tags():
+    # After commit, so a concurrent request cannot cache counts that are rolled back.
+    transaction.on_commit(lambda: cache.delete(TOP_TAGS_CACHE_KEY))
+
+
+def change_counts(tag_ids, delta):
+    if tag_ids and delta:
+        Tag.objects.filter(pk__in=tag_ids).update(quote_count=F("quote_count") + delta)
+        invalidate_top_tags()
+
+
+def recount_tags(tag_ids=None):
+    # Recomputes counters from the join table in one UPDATE, for writes that bypass the
+    # signals such as bulk_create on Quote.tags.through.
+    counts = (
+        Quote.tags.through.objects.filter(tag=OuterRef("pk"))
+        .order_by()
+        .values("tag")
+        .annotate(total=Count("quote"))
+        .values("total")
+    )
+    tags = Tag.objects.all() if tag_ids is None else Tag.objects.filter(pk__in=tag_ids)
+    tags.update(quote_count=Coalesce(Subquery(counts), Value(0)))
+    invalidate_top_tags()
@@ -1,12 +1,9 @@
 from django import template
-from quotes.models import Author
+from quotes.middleware import lookup_author
 
 register = template.Library()
 
 @register.filter(name="author")
 def get_author(author_id):
-    try:
-        author = Author.objects.get(id=author_id)
-        return author.fullname
-    except Author.DoesNotExist:
-        return "Unknown"
\ No newline at end of file
+    author = lookup_author(author_id)
+    return author.fullname if author else "Unknown"
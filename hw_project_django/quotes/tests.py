@@ -1,3 +1,487 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .ingest import ingest_authors, ingest_quotes, iter_json_array
+from .middleware import AuthorCacheMiddleware
+from .models import Author, Quote, Tag
+from .utils import scrape_and_save_quotes
+from . import jobs
+from .models import Job, ScrapedPage
+from .tag_stats import recount_tags, top_tags
+from .templatetags.extract import get_author
+
+
+def create_quotes(count, tags_per_quote=3):
+    tags = [Tag.objects.get_or_create(name=f"tag-{i}")[0] for i in range(tags_per_quote)]
+    for i in range(count):
+        author = Author.objects.create(fullname=f"Author {i}", born_date="", born_location="", description="")
+        quote = Quote.objects.create(quote=f"Quote {i}", author=author)
+        quote.tags.set(tags)
+    return tags
+
+
+class QuoteListingQueriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def assert_constant_queries(self, url, queries):
+        # A full page must cost the same as a page with a single quote.
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_index_page_queries_do_not_grow_with_quotes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_quotes(1)
+        # count, page with authors, tags of the page, top tags on a cold cache
+        self.assert_constant_queries(reverse("quotes:root"), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_quotes(10)
+        response = self.assert_constant_queries(reverse("quotes:root_paginate", args=[2]), 4)
+        self.assertContains(response, "Author 5")
+        self.assert_constant_queries(reverse("quotes:root"), 3)
+
+    def test_tag_page_queries_do_not_grow_with_quotes(self):
+        tags = create_quotes(7)
+        response = self.assert_constant_queries(reverse("quotes:tag_quotes", args=[tags[0].name]), 4)
+        self.assertTemplateUsed(response, "quotes/tag_quotes.html")
+        self.assertContains(response, "Quote 4")
+
+
+class AuthorFilterTest(TestCase):
+    def test_author_looked_up_once_per_request(self):
+        author = Author.objects.create(fullname="Jane Austen", born_date="", born_location="", description="")
+
+        def view(request):
+            with self.assertNumQueries(2):
+                names = [get_author(author.id) for _ in range(3)] + [get_author(0), get_author(0)]
+            return names
+
+        names = AuthorCacheMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(names, ["Jane Austen"] * 3 + ["Unknown"] * 2)
+
+    def test_author_outside_request(self):
+        author = Author.objects.create(fullname="Mark Twain", born_date="", born_location="", description="")
+        self.assertEqual(get_author(author.id), "Mark Twain")
+
+
+class TagCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(fullname="Author", born_date="", born_location="", description="")
+        self.life, self.love, self.books = [Tag.objects.create(name=name) for name in ("life", "love", "books")]
+
+    def quote(self, *tags):
+        quote = Quote.objects.create(quote="Quote", author=self.author)
+        quote.tags.add(*tags)
+        return quote
+
+    def counts(self):
+        return dict(Tag.objects.values_list("name", "quote_count"))
+
+    def test_counts_follow_tag_changes(self):
+        first = self.quote(self.life, self.love)
+        second = self.quote(self.life)
+        second.tags.add(self.life)
+        self.assertEqual(self.counts(), {"life": 2, "love": 1, "books": 0})
+
+        first.tags.remove(self.love)
+        second.tags.set([self.books])
+        self.assertEqual(self.counts(), {"life": 1, "love": 0, "books": 1})
+
+        self.books.quote_set.add(first)
+        first.tags.clear()
+        self.assertEqual(self.counts(), {"life": 0, "love": 0, "books": 1})
+
+        self.life.quote_set.add(first, second)
+        self.life.quote_set.clear()
+        second.delete()
+        self.assertEqual(self.counts(), {"life": 0, "love": 0, "books": 0})
+
+    def test_removing_unlinked_tags_changes_nothing(self):
+        quote = self.quote(self.life)
+        self.quote(self.love)
+        quote.tags.remove(self.love)
+        quote.tags.remove(self.books)
+        self.love.quote_set.remove(quote)
+        self.books.quote_set.remove(quote)
+        self.assertEqual(self.counts(), {"life": 1, "love": 1, "books": 0})
+
+        self.life.quote_set.remove(quote)
+        self.assertEqual(self.counts(), {"life": 0, "love": 1, "books": 0})
+
+    def test_top_tags_most_used_first_and_invalidated_on_commit(self):
+        self.quote(self.life, self.love)
+        self.quote(self.life)
+        self.assertEqual(top_tags(), [{"name": "life", "quote_count": 2}, {"name": "love", "quote_count": 1}])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(top_tags(1), [{"name": "life", "quote_count": 2}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quote(self.books, self.love)
+        self.assertEqual([tag["name"] for tag in top_tags()], ["life", "love", "books"])
+
+    def test_recount_after_bulk_insert(self):
+        quote = Quote.objects.create(quote="Quote", author=self.author)
+        Quote.tags.through.objects.bulk_create([
+            Quote.tags.through(quote=quote, tag=self.life),
+            Quote.tags.through(quote=quote, tag=self.love),
+        ])
+        self.assertEqual(self.counts()["life"], 0)
+        recount_tags([self.life.pk])
+        self.assertEqual(self.counts(), {"life": 1, "love": 0, "books": 0})
+        recount_tags()
+        self.assertEqual(self.counts(), {"life": 1, "love": 1, "books": 0})
+
+
+class IngestTest(TestCase):
+    def records(self, count, authors=3):
+        return [
+            {"quote": f"Quote {i}", "author": f"Author {i % authors}", "tags": [f"tag-{i % 4}", "common"]}
+            for i in range(count)
+        ]
+
+    def test_iter_json_array_reads_in_chunks(self):
+        items = [{"text": "a \u201cquoted\u201d, [bracket]"}, 12345, [1, 2], "x" * 50, None]
+        fd = io.StringIO(json.dumps(items, indent=2))
+        self.assertEqual(list(iter_json_array(fd, chunk_size=3)), items)
+        self.assertEqual(list(iter_json_array(io.StringIO("[]"))), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[{"a": 1}')))
+
+    def test_bundled_quotes_file(self):
+        path = Path(__file__).resolve().parent.parent / "utils" / "quotes.json"
+        with open(path, encoding="utf-8") as fd:
+            self.assertEqual(list(iter_json_array(fd, chunk_size=100)), json.loads(path.read_text(encoding="utf-8")))
+
+    def test_ingest_quotes_is_idempotent(self):
+        stats = ingest_quotes(self.records(10) + self.records(2), batch_size=4)
+        self.assertEqual(stats, {"authors": 3, "tags": 5, "quotes": 10, "skipped": 2})
+        self.assertEqual(Quote.objects.count(), 10)
+        self.assertEqual(Tag.objects.get(name="common").quote_count, 10)
+        self.assertEqual(sorted(Quote.objects.get(quote="Quote 5").tags.values_list("name", flat=True)), ["common", "tag-1"])
+
+        stats = ingest_quotes(self.records(10), batch_size=4)
+        self.assertEqual(stats, {"authors": 0, "tags": 0, "quotes": 0, "skipped": 10})
+        self.assertEqual(Quote.tags.through.objects.count(), 20)
+
+    def test_ingest_queries_per_batch_are_constant(self):
+        def queries_for(count, prefix):
+            records = [
+                {"quote": f"{prefix} quote {i}", "author": f"{prefix} author {i}", "tags": [f"{prefix}-{i}", f"{prefix}"]}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as captured:
+                ingest_quotes(records, batch_size=count)
+            return len(captured)
+
+        self.assertEqual(queries_for(5, "small"), queries_for(50, "large"))
+
+    def test_ingest_authors_fills_in_bare_authors(self):
+        ingest_quotes(self.records(1), batch_size=10)
+        created = ingest_authors([
+            {"fullname": "Author 0", "born_date": "1900", "born_location": "Kyiv", "description": "Writer"},
+            {"fullname": "Author 9", "born_date": "1901", "born_location": "Lviv", "description": "Poet"},
+        ])
+        self.assertEqual(created, 1)
+        self.assertEqual(Author.objects.get(fullname="Author 0").born_location, "Kyiv")
+        self.assertEqual(Author.objects.count(), 2)
+
+
+def quotes_page(page, last_page):
+    quotes = "".join(
+        f'''<div class="quote"><span class="text">Quote {page}-{i}</span>
+        <span>by <small class="author">Author {i}</small> <a href="/author/Author-{i}">(about)</a></span>
+        <div class="tags"><a class="tag" href="/tag/t{page}/">t{page}</a><a class="tag" href="/tag/all/">all</a></div></div>'''
+        for i in range(2)
+    ) if page <= last_page else "No quotes found!"
+    next_link = f'<li class="next"><a href="/page/{page + 1}/">Next</a></li>' if page < last_page else ""
+    return f"<html><body>{quotes}<ul class=\"pager\">{next_link}</ul></body></html>"
+
+
+def author_page(name):
+    return (f'<h3 class="author-title">{name}</h3><span class="author-born-date">March 14, 1879</span>'
+            f'<span class="author-born-location">in Ulm, Germany</span><div class="author-description">About {name}</div>')
+
+
+class FixtureSite:
+    # quotes.toscrape.com in miniature: numbered pages, author pages and ETag revalidation.
+    def __init__(self, last_page=3, delay=0.05):
+        self.last_page, self.delay = last_page, delay
+        self.requests, self.active, self.max_active = [], 0, 0
+        # path -> number of 503s to answer before serving it normally.
+        self.failures = {}
+        self.lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site.lock:
+                    site.requests.append(self.path)
+                    site.active += 1
+                    site.max_active = max(site.max_active, site.active)
+                try:
+                    time.sleep(site.delay)
+                    with site.lock:
+                        failing = site.failures.get(self.path, 0)
+                        site.failures[self.path] = failing - 1
+                    if failing > 0:
+                        self.send_response(503)
+                        self.end_headers()
+                        return
+                    body = site.render(self.path)
+                    if body is None:
+                        self.send_response(404)
+                        self.end_headers()
+                        return
+                    etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    self.wfile.write(body.encode())
+                finally:
+                    with site.lock:
+                        site.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def render(self, path):
+        if path == "/":
+            return quotes_page(1, self.last_page)
+        if path.startswith("/page/"):
+            return quotes_page(int(path.strip("/").split("/")[1]), self.last_page)
+        if path.startswith("/author/"):
+            return author_page(path.strip("/").split("/")[1].replace("-", " "))
+        return None
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(QUOTES_SCRAPE_RETRY_BACKOFF=0)
+class ScraperTest(TestCase):
+    def setUp(self):
+        self.site = FixtureSite(last_page=5)
+        self.addCleanup(self.site.close)
+
+    def test_scrapes_all_pages_and_authors_concurrently(self):
+        stats = scrape_and_save_quotes(self.site.url, concurrency=3)
+
+        self.assertEqual(Quote.objects.count(), 10)
+        self.assertEqual(stats["quotes"], 10)
+        self.assertEqual((stats["pages"], stats["errors"]), (5, 0))
+        self.assertEqual(stats["author_pages"], 2)
+        self.assertEqual(Author.objects.get(fullname="Author 1").born_location, "in Ulm, Germany")
+        self.assertEqual(Tag.objects.get(name="all").quote_count, 10)
+        self.assertEqual(len(self.site.requests), len(set(self.site.requests)))
+        self.assertTrue(set(f"/page/{page}/" for page in range(2, 6)) <= set(self.site.requests))
+        self.assertLessEqual(self.site.max_active, 3)
+        self.assertGreater(self.site.max_active, 1)
+
+    def test_second_run_revalidates_and_inserts_nothing(self):
+        first = scrape_and_save_quotes(self.site.url, concurrency=4)
+        self.assertEqual(ScrapedPage.objects.count(), first["pages"] + first["author_pages"])
+
+        second = scrape_and_save_quotes(self.site.url, concurrency=4)
+        self.assertEqual(second["not_modified"], second["pages"] + second["author_pages"])
+        self.assertEqual(second["rows_inserted"], 0)
+        self.assertEqual(second["skipped"], 10)
+
+    def test_missing_pages_past_the_end_are_not_errors(self):
+        render = self.site.render
+        self.site.render = lambda path: None if path in ("/page/6/", "/page/7/") else render(path)
+
+        stats = scrape_and_save_quotes(self.site.url, concurrency=3)
+        self.assertIn("/page/7/", self.site.requests)
+        self.assertEqual((stats["pages"], stats["errors"]), (5, 0))
+        self.assertEqual(ScrapedPage.objects.filter(url__contains="/page/6/").count(), 0)
+
+    def test_transient_failures_are_retried(self):
+        self.site.failures = {"/page/3/": 2}
+
+        stats = scrape_and_save_quotes(self.site.url, concurrency=3)
+        self.assertEqual((stats["pages"], stats["errors"], stats["quotes"]), (5, 0, 10))
+        self.assertEqual(self.site.requests.count("/page/3/"), 3)
+
+    def test_failing_page_is_skipped_and_reported(self):
+        self.site.failures = {"/page/3/": 10}
+
+        stats = scrape_and_save_quotes(self.site.url, concurrency=2)
+        self.assertEqual((stats["pages"], stats["errors"], stats["quotes"]), (4, 1, 8))
+        self.assertEqual(stats["failed_urls"], [f"{self.site.url}/page/3/"])
+        self.assertIn("/page/5/", self.site.requests)
+
+    def test_max_pages_and_unreachable_site(self):
+        stats = scrape_and_save_quotes(self.site.url, concurrency=2, max_pages=2)
+        self.assertEqual(stats["quotes"], 4)
+
+        self.site.close()
+        stats = scrape_and_save_quotes("http://127.0.0.1:9", concurrency=2)
+        self.assertEqual((stats["pages"], stats["errors"], stats["rows_inserted"]), (0, 1, 0))
+
+
+class JobTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("worker", password="secret-pass-123")
+        self.client.force_login(self.user)
+
+    def test_scrape_view_only_enqueues(self):
+        response = self.client.post(reverse("quotes:scrape"))
+        job = Job.objects.get()
+        self.assertRedirects(response, f"{reverse('quotes:scrape')}?job={job.id}")
+        self.assertEqual((job.kind, job.status, job.created_by), (jobs.SCRAPE, Job.Status.QUEUED, self.user))
+        self.assertEqual(Quote.objects.count(), 0)
+
+        self.client.post(reverse("quotes:scrape"))
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertContains(self.client.get(f"{reverse('quotes:scrape')}?job={job.id}"), "is queued")
+
+    def test_worker_runs_scrape_and_reports_status(self):
+        site = FixtureSite(last_page=2, delay=0)
+        self.addCleanup(site.close)
+        job = jobs.enqueue(jobs.SCRAPE, {"base_url": site.url, "concurrency": 2})
+
+        call_command("run_jobs", "--once", stdout=io.StringIO())
+
+        status = self.client.get(reverse("quotes:job_status", args=[job.id])).json()
+        self.assertEqual(status["status"], "succeeded")
+        self.assertEqual(status["pages_fetched"], 2)
+        self.assertEqual(status["rows_inserted"], Author.objects.count() + Tag.objects.count() + Quote.objects.count())
+        self.assertEqual(Quote.objects.count(), 4)
+        self.assertIsNotNone(status["duration"])
+
+    def test_running_job_saves_progress(self):
+        site = FixtureSite(last_page=3, delay=0)
+        self.addCleanup(site.close)
+        job = jobs.enqueue(jobs.SCRAPE, {"base_url": site.url, "concurrency": 2})
+        seen = []
+
+        def handler(params, progress):
+            def save(stats):
+                progress(stats)
+                seen.append(jobs.job_status(Job.objects.get(id=job.id)))
+            return jobs.run_scrape(params, save)
+
+        with mock.patch.dict(jobs.HANDLERS, {jobs.SCRAPE: handler}):
+            job = jobs.run_job(jobs.claim_next())
+
+        self.assertEqual({status["status"] for status in seen}, {"running"})
+        pages = [status["pages_fetched"] for status in seen]
+        self.assertEqual(pages, sorted(pages))
+        self.assertEqual(pages[-1], 3)
+        self.assertEqual(seen[0]["rows_inserted"], 0)
+        self.assertEqual(seen[-1]["rows_inserted"], job.stats["rows_inserted"])
+
+    def test_failed_job_and_import_job(self):
+        failed = jobs.enqueue(jobs.IMPORT_QUOTES, {"path": "/nonexistent/quotes.json"})
+        path = Path(__file__).resolve().parent.parent / "utils"
+        imported = jobs.enqueue(jobs.IMPORT_QUOTES, {"path": str(path / "quotes.json"), "authors_path": str(path / "authors.json")})
+
+        self.assertEqual(jobs.run_job(jobs.claim_next()).status, Job.Status.FAILED)
+        self.assertEqual(jobs.run_job(jobs.claim_next()).status, Job.Status.SUCCEEDED)
+        self.assertIsNone(jobs.claim_next())
+
+        self.assertIn("FileNotFoundError", jobs.job_status(Job.objects.get(id=failed.id))["error"])
+        self.assertEqual(Job.objects.get(id=imported.id).stats["quotes"], Quote.objects.count())
+
+    def make_stale(self, job):
+        Job.objects.filter(id=job.id).update(heartbeat_at=job.created_at - timedelta(hours=2))
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue(jobs.SCRAPE)
+        jobs.claim_next()
+        self.assertEqual(jobs.requeue_stale(3600), 0)
+        self.make_stale(job)
+        self.assertEqual(jobs.requeue_stale(3600), 1)
+        self.assertEqual(jobs.claim_next().attempt, 2)
+
+    def test_requeued_job_is_abandoned_by_its_old_worker(self):
+        job = jobs.enqueue(jobs.SCRAPE)
+        calls = []
+
+        def handler(params, progress):
+            calls.append("started")
+            # Meanwhile the worker is considered dead and another one claims the job.
+            self.make_stale(job)
+            jobs.requeue_stale(3600)
+            jobs.claim_next()
+            progress({"pages": 1})
+            calls.append("not reached")
+            return {}
+
+        out = io.StringIO()
+        with mock.patch.dict(jobs.HANDLERS, {jobs.SCRAPE: handler}):
+            call_command("run_jobs", "--once", stdout=out)
+
+        self.assertEqual(calls, ["started"])
+        self.assertIn(f"Job {job.id} was requeued and taken over by another worker", out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempt, job.stats), (Job.Status.RUNNING, 2, {}))
+
+    def test_old_worker_cannot_finish_a_job_it_lost(self):
+        jobs.enqueue(jobs.SCRAPE)
+        first = jobs.claim_next()
+        self.make_stale(first)
+        jobs.requeue_stale(3600)
+        jobs.claim_next()
+
+        with mock.patch.dict(jobs.HANDLERS, {jobs.SCRAPE: lambda params, progress: {"pages": 9}}):
+            job = jobs.run_job(first)
+        self.assertEqual((job.status, job.attempt, job.stats), (Job.Status.RUNNING, 2, {}))
+
+    def test_one_queued_job_per_piece_of_work(self):
+        job = jobs.enqueue(jobs.SCRAPE, {"max_pages": 1})
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind=jobs.SCRAPE, params={"max_pages": 1})
+
+        # A submission that checked before the other one created the job gets the winner's job.
+        first = QuerySet.first
+        lookups = []
+
+        def racing_first(queryset):
+            lookups.append(queryset)
+            return None if len(lookups) == 1 else first(queryset)
+
+        with mock.patch.object(QuerySet, "first", racing_first):
+            self.assertEqual(jobs.enqueue(jobs.SCRAPE, {"max_pages": 1}), job)
+        self.assertEqual((len(lookups), Job.objects.count()), (2, 1))
+
+    def test_stale_job_whose_work_is_queued_again_is_failed(self):
+        job = jobs.enqueue(jobs.SCRAPE)
+        jobs.claim_next()
+        again = jobs.enqueue(jobs.SCRAPE)
+        self.make_stale(job)
+
+        self.assertEqual(jobs.requeue_stale(3600), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(jobs.claim_next().id, again.id)
@@ -13,4 +13,5 @@ urlpatterns = [
     path('add_author/', views.add_author, name="add_author"),
     path('add_quote/', views.add_quote, name="add_quote"),
     path("scrape/", views.scrape_view, name="scrape"),
+    path("jobs/<int:job_id>/", views.job_status, name="job_status"),
 ]
\ No newline at end of file
@@ -1,29 +1,73 @@
-import requests
-from bs4 import BeautifulSoup
-from .models import Author, Quote, Tag
-
-def scrape_and_save_quotes():
-    url = "http://quotes.toscrape.com"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        return
+import asyncio
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .ingest import ingest_authors, ingest_quotes
+from .models import ScrapedPage
+from .scraper import QuoteScraper
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    quotes_divs = soup.find_all("div", class_="quote")
+def scrape_and_save_quotes(base_url=None, concurrency=None, max_pages=None, progress=None):
+    # `progress`, if given, is called with the running stats after every page and every
+    # ingest batch.
+    started = time.monotonic()
+    cache = {
+        page["url"]: page
+        for page in ScrapedPage.objects.values("url", "etag", "last_modified", "body")
+    }
+    scraper = QuoteScraper(
+        base_url or settings.QUOTES_SCRAPE_URL,
+        cache=cache,
+        concurrency=concurrency or settings.QUOTES_SCRAPE_CONCURRENCY,
+        timeout=settings.QUOTES_SCRAPE_TIMEOUT,
+        max_pages=max_pages,
+        retries=settings.QUOTES_SCRAPE_RETRIES,
+        backoff=settings.QUOTES_SCRAPE_RETRY_BACKOFF,
+    )
+    _crawl(scraper, progress)
 
-    for div in quotes_divs:
-        text = div.find("span", class_="text").get_text(strip=True)
-        author_name = div.find("small", class_="author").get_text(strip=True)
-        tags = [tag.get_text(strip=True) for tag in div.find_all("a", class_="tag")]
+    # Upsert the validators of every page that came back with a new body.
+    ScrapedPage.objects.bulk_create(
+        [ScrapedPage(url=url, **entry) for url, entry in scraper.fetched.items()],
+        update_conflicts=True,
+        unique_fields=["url"],
+        update_fields=["etag", "last_modified", "body", "fetched_at"],
+    )
+    # Authors first, so quotes attach to authors that already have their details.
+    authors_created = ingest_authors(scraper.authors.values())
 
-        author, _ = Author.objects.get_or_create(fullname=author_name)
-        quote, created = Quote.objects.get_or_create(text=text, author=author)
+    def summary(stats):
+        stats = {**stats, "authors": stats["authors"] + authors_created}
+        return {
+            **scraper.stats,
+            "rows_inserted": stats["authors"] + stats["tags"] + stats["quotes"],
+            **stats,
+        }
 
-        for tag_name in tags:
-            tag, _ = Tag.objects.get_or_create(name=tag_name)
-            quote.tags.add(tag)
+    batch_done = (lambda stats: progress(summary(stats))) if progress else None
+    stats = ingest_quotes(scraper.quotes, progress=batch_done)
+    return {**summary(stats), "duration": round(time.monotonic() - started, 3)}
 
-        quote.save()
\ No newline at end of file
+
+def _crawl(scraper, progress):
+    if progress is None:
+        asyncio.run(scraper.run())
+        return
+    # The ORM can't be used from inside the event loop, so the crawl runs on a worker thread
+    # and its updates are handed to `progress` here. Only the latest of a burst is passed on;
+    # nothing is inserted until the crawl is over.
+    updates = queue.SimpleQueue()
+    scraper.progress = updates.put
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        crawl = executor.submit(asyncio.run, scraper.run())
+        while not crawl.done() or not updates.empty():
+            try:
+                stats = updates.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            while not updates.empty():
+                stats = updates.get()
+            progress({**stats, "rows_inserted": 0})
+        crawl.result()
@@ -1,36 +1,43 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Quote, Author, Tag
+from django.urls import reverse
+from .models import Quote, Author, Tag, Job
 from .forms import QuoteForm, AuthorForm
-from django.db.models import Count
-from .utils import scrape_and_save_quotes
+from . import jobs
+from .middleware import remember_authors
+from .tag_stats import top_tags
+
+
+def quote_listing():
+    # One query for the page with its authors joined in, one for all tags on the page.
+    return Quote.objects.select_related("author").prefetch_related("tags").order_by("id")
+
+
+def paginate_quotes(quotes, page_number):
+    quotes_on_page = Paginator(quotes, 5).get_page(page_number)
+    remember_authors(quote.author for quote in quotes_on_page if quote.author)
+    return quotes_on_page
 
 
 def main(request, page=1):
-    quotes = Quote.objects.all()
-    paginator = Paginator(quotes,5)
-    page_number = page
-    quotes_on_page = paginator.get_page(page_number)
+    quotes_on_page = paginate_quotes(quote_listing(), page)
 
-    top_tags = Tag.objects.annotate(num_quotes=Count("quote")).order_by("num_quotes")[:10]
     context = {
         "quotes": quotes_on_page,
         "has_prev": quotes_on_page.has_previous(),
         "has_next": quotes_on_page.has_next(),
         "prev_page": quotes_on_page.previous_page_number() if quotes_on_page.has_previous() else None,
         "next_page": quotes_on_page.next_page_number() if quotes_on_page.has_next() else None,
-        "top_tags": top_tags,
+        "top_tags": top_tags(10),
     }
 
     return render(request, "quotes/index.html", context=context)
 
 def tags_search(request, tag_name):
     tag = get_object_or_404(Tag, name=tag_name)
-    quotes = Quote.objects.filter(tags=tag)
-    paginator = Paginator(quotes,5)
-    page_number = request.GET.get("page", 1)
-    quotes_on_page = paginator.get_page(page_number)
+    quotes_on_page = paginate_quotes(quote_listing().filter(tags=tag), request.GET.get("page", 1))
 
     context = {
         "quotes": quotes_on_page,
@@ -41,7 +48,7 @@ def tags_search(request, tag_name):
         "next_page": quotes_on_page.next_page_number() if quotes_on_page.has_next() else None,
 
     }
-    return render(request, "quotes/author_detail.html", context=context)
+    return render(request, "quotes/tag_quotes.html", context=context)
 
 def author_detail(request, author_id):
     author = get_object_or_404(Author, id=author_id)
@@ -73,7 +80,16 @@ def add_quote(request):
 
 @login_required
 def scrape_view(request):
+    # The scrape runs in the run_jobs worker; the request only queues it.
     if request.method == "POST":
-        scrape_and_save_quotes()
-        return redirect("quotes:list")
-    return render(request, "quotes/scrape.html")
\ No newline at end of file
+        job = jobs.enqueue(jobs.SCRAPE, user=request.user)
+        return redirect(f"{reverse('quotes:scrape')}?job={job.id}")
+    job = None
+    if request.GET.get("job", "").isdigit():
+        job = Job.objects.filter(id=request.GET["job"]).first()
+    return render(request, "quotes/scrape.html", {"job": job})
+
+@login_required
+def job_status(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    return JsonResponse(jobs.job_status(job))
\ No newline at end of file
@@ -1,7 +1,7 @@
+import argparse
 import os
 import sys
 import django
-import json
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
@@ -10,30 +10,32 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hw_project.settings")
 
 django.setup()
 
-from quotes.models import Author, Quote, Tag
+from quotes.ingest import BATCH_SIZE, ingest_authors, ingest_quotes, iter_json_array
 
-def migrate_quotes(json_file_path):
+def migrate_authors(json_file_path, batch_size=BATCH_SIZE):
     with open(json_file_path, "r", encoding="utf-8") as fd:
-        quotes = json.load(fd)
+        created = ingest_authors(iter_json_array(fd), batch_size=batch_size)
+    print(f"Authors created: {created}")
 
-    for quote in quotes:
-        author_name = quote.get("author")
-        quote_text = quote.get("quote")
-        tags_list = quote.get("tags", [])
-
-        author, _ = Author.objects.get_or_create(fullname=author_name)
-
-        quote, created = Quote.objects.get_or_create(quote=quote_text, author=author)
-
-        tag_objects = []
-        for tag_name in tags_list:
-            tag, _ = Tag.objects.get_or_create(name=tag_name)
-            tag_objects.append(tag)
-        quote.tags.set(tag_objects)
-
-        quote.save()
-
-    print("Migración completada con éxito.")
+def migrate_quotes(json_file_path, batch_size=BATCH_SIZE):
+    with open(json_file_path, "r", encoding="utf-8") as fd:
+        stats = ingest_quotes(iter_json_array(fd), batch_size=batch_size)
+    print(f"Migración completada con éxito: {stats}")
 
 if __name__ == "__main__":
-    migrate_quotes("utils/quotes.json")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Import quotes (and optionally authors) from JSON files")
+    parser.add_argument("--quotes", default="utils/quotes.json")
+    parser.add_argument("--authors", help="authors JSON file, imported before the quotes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--enqueue", action="store_true", help="queue the import for the run_jobs worker")
+    args = parser.parse_args()
+    if args.enqueue:
+        from quotes.jobs import IMPORT_QUOTES, enqueue
+        params = {"path": os.path.abspath(args.quotes), "batch_size": args.batch_size}
+        if args.authors:
+            params["authors_path"] = os.path.abspath(args.authors)
+        print(f"Queued job {enqueue(IMPORT_QUOTES, params).id}")
+        sys.exit()
+    if args.authors:
+        migrate_authors(args.authors, args.batch_size)
+    migrate_quotes(args.quotes, args.batch_size)
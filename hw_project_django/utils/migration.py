@@ -1,3 +1,4 @@
+import argparse
 import os
 import django
 from dotenv import load_dotenv
@@ -7,46 +8,35 @@ from pymongo import MongoClient
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hw_project.settings")
 django.setup()
 
-from quotes.models import Quote, Tag, Author  # noqa
-
-mongo_uri = os.getenv("MONGODB_URI")
-if not mongo_uri:
-    raise ValueError("Missing MONGODB_URI in .env file")
-
-client = MongoClient(mongo_uri)
-db = client.hw
-
-authors = db.authors.find()
-
-for author in authors:
-    Author.objects.get_or_create(
-        fullname=author["fullname"],
-        born_date=author["born_date"],
-        born_location=author["born_location"],
-        description=author["description"]
-    )
-
-
-for quote in db.quotes.find():
-    if "author" not in quote:
-        continue
-
-    tags = []
-    for tag in quote["tags"]:
-        t, _ = Tag.objects.get_or_create(name=tag)
-        tags.append(t)
-
-    if not Quote.objects.filter(quote=quote["quote"]).exists():
-        mongo_author = db.authors.find_one({"_id": quote["author"]})
-        if not mongo_author:
-            continue
-        try:
-            a = Author.objects.get(fullname=mongo_author["fullname"])
-        except Author.DoesNotExist:
-            continue
-
-        q = Quote.objects.create(
-            quote=quote["quote"],
-            author=a
-        )
-        q.tags.add(*tags)
\ No newline at end of file
+from quotes.ingest import BATCH_SIZE, batched, ingest_authors, ingest_quotes  # noqa
+
+
+def mongo_quote_records(db, batch_size):
+    # Quotes reference authors by ObjectId; each batch resolves its authors with one $in query.
+    quotes = db.quotes.find({"author": {"$exists": True}}, {"quote": 1, "author": 1, "tags": 1}, batch_size=batch_size)
+    for batch in batched(quotes, batch_size):
+        author_ids = list({quote["author"] for quote in batch})
+        names = {
+            author["_id"]: author["fullname"]
+            for author in db.authors.find({"_id": {"$in": author_ids}}, {"fullname": 1})
+        }
+        for quote in batch:
+            if quote["author"] in names:
+                yield {"quote": quote["quote"], "author": names[quote["author"]], "tags": quote.get("tags", [])}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy authors and quotes from MongoDB")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    mongo_uri = os.getenv("MONGODB_URI")
+    if not mongo_uri:
+        raise ValueError("Missing MONGODB_URI in .env file")
+
+    client = MongoClient(mongo_uri)
+    db = client.hw
+
+    authors = db.authors.find({}, {"fullname": 1, "born_date": 1, "born_location": 1, "description": 1}, batch_size=args.batch_size)
+    print(f"Authors created: {ingest_authors(authors, batch_size=args.batch_size)}")
+    print(f"Quotes: {ingest_quotes(mongo_quote_records(db, args.batch_size), batch_size=args.batch_size)}")
@@ -1,43 +1,37 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional
 import uuid
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.database.models import User, VerificationToken
+from src.database.db import after_commit, get_db
+from src.database.models import User
 from src.schemas.user import TokenData
 from src.repository import users as repository_users
-from src.repository import auth as repository_auth
-from src.conf.config import settings
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.services.verification_tokens import token_store
+from src.auth import tokens
+from src.cache.user_cache import get_cached_user, cache_user
+from src.services.passwords import password_hasher
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_password_hash(password:str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password:str) -> str:
+    return await password_hasher.hash(password)
 
-def verify_password(plain_password: str, hashed_password:str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password:str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(days=7))
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    return tokens.issue_token(data, tokens.ACCESS, expires_delta)
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(days=30))
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.refresh_secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    return tokens.issue_token(data, tokens.REFRESH, expires_delta)
+
+def token_claims(user: User) -> dict:
+    # uid/verified let get_current_user trust the token without loading the user.
+    return {"sub": user.email, "uid": user.id, "verified": bool(user.is_verified)}
 
 async def get_current_user(token:str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
@@ -45,17 +39,20 @@ async def get_current_user(token:str = Depends(oauth2_scheme), db: AsyncSession
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
+    claims = await tokens.verify_token(token, tokens.ACCESS)
+    if claims is None or claims.get("sub") is None:
         raise credentials_exception
-    user = await repository_users.get_user_by_email(token_data.email, db)
+    token_data = TokenData(email=claims["sub"])
+    if claims.get("uid") is not None and claims.get("verified"):
+        # Verification is never undone, so a verified token needs no user lookup. The instance
+        # is transient and only carries what the token vouches for.
+        return User(id=claims["uid"], email=token_data.email, is_verified=True)
+    user = await get_cached_user(token_data.email)
     if user is None:
-        raise credentials_exception
+        user = await repository_users.get_user_by_email(db, token_data.email)
+        if user is None:
+            raise credentials_exception
+        await cache_user(user)
     if not user.is_verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,43 +62,23 @@ async def get_current_user(token:str = Depends(oauth2_scheme), db: AsyncSession
     return user
 
 
-def create_email_verification_token_and_save(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(days=14))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.refresh_secret_key, algorithm=settings.algorithm)
-
+async def save_verification_token(user_id: int, token: str, token_type: str, db: AsyncSession) -> None:
+    await token_store.save(db, user_id, token, token_type)
 
-def create_email_verification_token(user_id: int) -> str:
+async def create_email_verification_token(user_id: int, db: AsyncSession) -> str:
     token = str(uuid.uuid4())
+    await save_verification_token(user_id, token, "email_verification", db)
     return token
 
-async def save_verification_token(user_id: int, token: str, token_type:str, db:AsyncSession) -> None:
-    expires_at = datetime.utcnow() + timedelta(hours=2)
-    verification_token_db = VerificationToken(
-        user_id=user_id,
-        token=token,
-        token_type=token_type,
-        expires_at=expires_at
-    )
-    await repository_auth.create_verification_token(verification_token_db, db)
-
 async def verify_email_token(token: str, db: AsyncSession) -> Optional[User]:
-    verification_token = await repository_auth.get_verification_token(token, "email_verification", db)
-
-    if verification_token is None or verification_token.expires_at < datetime.utcnow():
+    user_id = await token_store.consume(db, token, "email_verification")
+    if user_id is None:
         return None
-
-    user = await repository_users.get_user_by_id(verification_token.user_id, db)
-    if user:
-        user.is_verified = True
-        await repository_users.update_user(user, db)
-        await repository_auth.delete_verification_token(verification_token.id, db)
-    return user
+    return await repository_users.update_user_is_verified(db, user_id, True)
 
 
 async def create_password_reset_token_and_save(user_email: str, db: AsyncSession) -> Optional[str]:
-    user = await repository_users.get_user_by_email(user_email, db)
+    user = await repository_users.get_user_by_email(db, user_email)
     if not user:
         return None
 
@@ -110,14 +87,12 @@ async def create_password_reset_token_and_save(user_email: str, db: AsyncSession
     return token
 
 async def reset_password(token: str, new_password: str, db: AsyncSession) -> Optional[User]:
-    reset_token = await repository_auth.get_verification_token(token, "password_reset", db)
-
-    if reset_token is None or reset_token.expires_at < datetime.utcnow():
+    user_id = await token_store.consume(db, token, "password_reset")
+    if user_id is None:
         return None
 
-    user = await repository_users.get_user_by_id(reset_token.user_id, db)
+    hashed_new_password = await get_password_hash(new_password)
+    user = await repository_users.update_user_password(db, user_id, hashed_new_password)
     if user:
-        hashed_new_password = get_password_hash(new_password)
-        await repository_users.update_user_password(user.id, hashed_new_password, db)
-        await repository_auth.delete_verification_token(reset_token.id, db)
-    return user
\ No newline at end of file
+        after_commit(db, tokens.revoke_user_tokens, user.id)
+    return user
@@ -0,0 +1,229 @@
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from jose import JWTError, jwt
+from redis.exceptions import RedisError
+
+from src.cache.redis_client import redis_client
+from src.cache.tiered import LocalLRU
+from src.conf.config import settings
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+ACCESS_TOKEN_LIFETIME = timedelta(days=7)
+REFRESH_TOKEN_LIFETIME = timedelta(days=30)
+
+# Decoded claims keyed by a hash of the token, kept until the token expires. Only the signature
+# check and claim parsing are skipped on a hit; revocation is still checked on every request.
+claims_cache = LocalLRU(maxsize=settings.token_cache_size, ttl=ACCESS_TOKEN_LIFETIME.total_seconds())
+
+token_stats = {
+    "decoded": 0,
+    "cache_hits": 0,
+    "rejected": 0,
+    "revoked": 0,
+    "revocation_errors": 0,
+    "refreshed": 0,
+    "refresh_reuse": 0,
+    "session_errors": 0,
+}
+
+
+def _secret(token_type: str) -> str:
+    return settings.secret_key if token_type == ACCESS else settings.refresh_secret_key
+
+
+def _cache_key(token: str, token_type: str) -> str:
+    return f"{token_type}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def _revoked_token_key(jti: str) -> str:
+    return f"revoked:jti:{jti}"
+
+
+def _revoked_user_key(user_id: int) -> str:
+    return f"revoked:user:{user_id}"
+
+
+def _family_key(family: str) -> str:
+    return f"refresh:family:{family}"
+
+
+def issue_token(data: dict, token_type: str, expires_delta: Optional[timedelta] = None) -> str:
+    now = datetime.now(timezone.utc)
+    lifetime = expires_delta or (ACCESS_TOKEN_LIFETIME if token_type == ACCESS else REFRESH_TOKEN_LIFETIME)
+    claims = {
+        "jti": uuid.uuid4().hex,
+        **data,
+        "typ": token_type,
+        "iat": int(now.timestamp()),
+        # iat has one-second resolution; revocation cutoffs need to tell apart a token issued
+        # just before a password reset from one issued just after it.
+        "iat_ms": int(now.timestamp() * 1000),
+        "exp": now + lifetime,
+    }
+    return jwt.encode(claims, _secret(token_type), algorithm=settings.algorithm)
+
+
+def decode_token(token: str, token_type: str) -> Optional[dict]:
+    key = _cache_key(token, token_type)
+    claims = claims_cache.get(key, None)
+    if claims is not None:
+        token_stats["cache_hits"] += 1
+        return claims
+    try:
+        claims = jwt.decode(token, _secret(token_type), algorithms=[settings.algorithm])
+    except JWTError:
+        token_stats["rejected"] += 1
+        return None
+    # Tokens issued before "typ" existed are access tokens; the secrets differ per type anyway.
+    if claims.get("typ", ACCESS) != token_type:
+        token_stats["rejected"] += 1
+        return None
+    token_stats["decoded"] += 1
+    if "exp" in claims:
+        claims_cache.set(key, claims, ttl=max(claims["exp"] - time.time(), 0))
+    else:
+        claims_cache.set(key, claims)
+    return claims
+
+
+async def is_revoked(claims: dict) -> bool:
+    # One MGET covers the token's own deny entry, the per-user "revoked before" cutoff and,
+    # for tokens issued in a refresh family, whether that family is still alive.
+    jti, user_id, family = claims.get("jti"), claims.get("uid"), claims.get("fam")
+    keys = {}
+    if jti:
+        keys["jti"] = _revoked_token_key(jti)
+    if user_id is not None:
+        keys["user"] = _revoked_user_key(user_id)
+    if family:
+        keys["family"] = _family_key(family)
+    if not keys:
+        return False
+    try:
+        values = dict(zip(keys, await redis_client.mget(list(keys.values()))))
+    except RedisError as e:
+        # Fails open like the other Redis-backed caches: the signature and expiry still hold.
+        token_stats["revocation_errors"] += 1
+        print(f"Token revocation check failed: {e}")
+        return False
+    if values.get("jti") is not None:
+        return True
+    if family and values["family"] is None:
+        return True
+    cutoff = values.get("user")
+    if cutoff is None:
+        return False
+    # Tokens from before iat_ms count from the start of their second.
+    issued_ms = claims.get("iat_ms", claims.get("iat", 0) * 1000)
+    return issued_ms <= float(cutoff) * 1000
+
+
+async def verify_token(token: str, token_type: str) -> Optional[dict]:
+    claims = decode_token(token, token_type)
+    if claims is None:
+        return None
+    if await is_revoked(claims):
+        token_stats["revoked"] += 1
+        return None
+    return claims
+
+
+def _remaining_seconds(claims: dict) -> int:
+    return max(int(claims.get("exp", time.time()) - time.time()), 1)
+
+
+async def revoke_token(token: str, token_type: str) -> bool:
+    claims = decode_token(token, token_type)
+    if claims is None or not claims.get("jti"):
+        return False
+    # The deny entry only has to outlive the token itself.
+    await redis_client.set(_revoked_token_key(claims["jti"]), 1, ex=_remaining_seconds(claims))
+    claims_cache.delete(_cache_key(token, token_type))
+    return True
+
+
+async def revoke_user_tokens(user_id: int) -> None:
+    # Every token of the user issued up to now is rejected, e.g. after a password reset.
+    # Stored in seconds with millisecond precision; older integer cutoffs still parse.
+    lifetime = int(max(ACCESS_TOKEN_LIFETIME, REFRESH_TOKEN_LIFETIME).total_seconds())
+    await redis_client.set(_revoked_user_key(user_id), f"{time.time():.3f}", ex=lifetime)
+
+
+# Compare-and-swap of a family's current refresh jti. Returns 1 when the presented jti was the
+# current one and has been replaced, -1 when an already rotated jti was replayed (the family
+# is destroyed), 0 when the family no longer exists.
+ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+_rotate_family = redis_client.register_script(ROTATE_SCRIPT)
+
+ROTATED = 1
+REUSED = -1
+UNKNOWN_FAMILY = 0
+
+
+async def start_session(claims: dict) -> Tuple[str, str]:
+    # Login opens a new refresh family; both tokens carry its id so ending the family also
+    # invalidates the access tokens it produced.
+    family, jti = uuid.uuid4().hex, uuid.uuid4().hex
+    try:
+        await redis_client.set(_family_key(family), jti, ex=int(REFRESH_TOKEN_LIFETIME.total_seconds()))
+    except RedisError as e:
+        # Fails open like the revocation check: the pair is issued without a family, the way
+        # tokens were before families existed, and its first refresh opens one.
+        token_stats["session_errors"] += 1
+        print(f"Could not open refresh family for user {claims.get('uid')}: {e}")
+        return issue_token(claims, ACCESS), issue_token({**claims, "jti": jti}, REFRESH)
+    access_token = issue_token({**claims, "fam": family}, ACCESS)
+    refresh_token = issue_token({**claims, "fam": family, "jti": jti}, REFRESH)
+    return access_token, refresh_token
+
+
+async def rotate_session(refresh_token: str) -> Tuple[int, Optional[Tuple[str, str]]]:
+    claims = await verify_token(refresh_token, REFRESH)
+    if claims is None:
+        return UNKNOWN_FAMILY, None
+    session_claims = {key: claims[key] for key in ("sub", "uid", "verified") if key in claims}
+    family = claims.get("fam")
+    if not family:
+        # Refresh tokens from before families existed are honoured once and then denied.
+        await revoke_token(refresh_token, REFRESH)
+        return ROTATED, await start_session(session_claims)
+    jti = uuid.uuid4().hex
+    outcome = await _rotate_family(
+        keys=[_family_key(family)],
+        args=[claims["jti"], jti, int(REFRESH_TOKEN_LIFETIME.total_seconds())],
+    )
+    if outcome != ROTATED:
+        if outcome == REUSED:
+            token_stats["refresh_reuse"] += 1
+            print(f"Refresh token reuse detected for user {claims.get('uid')}; family {family} revoked")
+        return outcome, None
+    token_stats["refreshed"] += 1
+    access_token = issue_token({**session_claims, "fam": family}, ACCESS)
+    return ROTATED, (access_token, issue_token({**session_claims, "fam": family, "jti": jti}, REFRESH))
+
+
+async def end_session(token: str, token_type: str) -> None:
+    claims = decode_token(token, token_type)
+    if claims and claims.get("fam"):
+        await redis_client.delete(_family_key(claims["fam"]))
+
+
+def get_token_stats() -> dict:
+    return {**token_stats, "cached_claims": claims_cache.stats()["size"]}
@@ -0,0 +1,108 @@
+import time
+import uuid
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+
+from src.cache.redis_client import redis_client
+
+
+class RateLimitPolicy(NamedTuple):
+    name: str
+    limit: int
+    window: float
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "RateLimitPolicy":
+        # "5/60" = at most 5 requests in any 60-second window.
+        limit, window = spec.split("/")
+        return cls(name, int(limit), float(window))
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    policy: RateLimitPolicy
+    remaining: int
+    reset: float
+
+
+# Sliding-window log: one sorted set per (policy, identity) holding the timestamps of the
+# requests in the current window. Every key is trimmed and counted first; the request is
+# recorded in all of them only if none is full, so a rejected request costs no quota.
+# Returns the allowed flag and, for the policy with the fewest requests left, its index,
+# remaining count and milliseconds until its oldest request leaves the window.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local allowed = 1
+local counts = {}
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[1 + 2 * i])
+    local limit = tonumber(ARGV[2 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    counts[i] = redis.call('ZCARD', key)
+    if counts[i] >= limit then
+        allowed = 0
+    end
+end
+local tightest, remaining, reset = 1, -1, 0
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[1 + 2 * i])
+    local limit = tonumber(ARGV[2 + 2 * i])
+    local count = counts[i]
+    if allowed == 1 then
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, math.ceil(window))
+        count = count + 1
+    end
+    local left = math.max(limit - count, 0)
+    local until_reset = window
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        until_reset = tonumber(oldest[2]) + window - now
+    end
+    if remaining < 0 or left < remaining then
+        tightest, remaining, reset = i, left, until_reset
+    end
+end
+return {allowed, tightest, remaining, math.ceil(reset)}
+"""
+
+
+class SlidingWindowLimiter:
+    def __init__(self, redis):
+        self._script = redis.register_script(SLIDING_WINDOW_SCRIPT)
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    @staticmethod
+    def _key(policy: RateLimitPolicy, identity: str) -> str:
+        return f"rl:{policy.name}:{identity}"
+
+    async def hit(self, checks: Sequence[Tuple[RateLimitPolicy, str]]) -> Optional[RateLimitResult]:
+        # One EVALSHA for all policies of a request. Returns None when Redis is unavailable;
+        # callers let the request through rather than failing it.
+        now_ms = time.time() * 1000
+        args = [now_ms, f"{now_ms}:{uuid.uuid4().hex[:8]}"]
+        for policy, _ in checks:
+            args.extend([policy.window * 1000, policy.limit])
+        try:
+            allowed, tightest, remaining, reset_ms = await self._script(
+                keys=[self._key(policy, identity) for policy, identity in checks], args=args
+            )
+        except RedisError as e:
+            self.errors += 1
+            print(f"Rate limit check failed: {e}")
+            return None
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return RateLimitResult(bool(allowed), checks[tightest - 1][0], int(remaining), max(reset_ms, 0) / 1000)
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "limited": self.limited, "errors": self.errors}
+
+
+rate_limiter = SlidingWindowLimiter(redis_client)
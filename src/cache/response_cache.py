@@ -0,0 +1,85 @@
+import hashlib
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request, Response, status
+from redis.exceptions import RedisError
+
+from src.cache.redis_client import redis_client
+from src.conf.config import settings
+
+response_cache_stats = {"hits": 0, "misses": 0, "not_modified": 0, "errors": 0}
+
+
+def _version_key(owner_id: int) -> str:
+    return f"resp:ver:{owner_id}"
+
+
+def _entry_key(owner_id: int, version: str, name: str) -> str:
+    return f"resp:{owner_id}:{version}:{name}"
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def bump_owner_version(owner_id: int) -> None:
+    # Every cached response of the owner embeds the version in its key, so one INCR retires all of them.
+    try:
+        await redis_client.incr(_version_key(owner_id))
+    except RedisError as e:
+        response_cache_stats["errors"] += 1
+        print(f"Response cache invalidation failed: {e}")
+
+
+async def _lookup(owner_id: int, name: str):
+    version = await redis_client.get(_version_key(owner_id)) or "0"
+    key = _entry_key(owner_id, version, name)
+    return key, await redis_client.hgetall(key)
+
+
+async def _store(key: str, etag: str, body: bytes) -> None:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={"etag": etag, "body": body.decode("utf-8")})
+        pipe.expire(key, settings.response_cache_ttl)
+        await pipe.execute()
+
+
+async def cached_json_response(request: Request, owner_id: int, name: str,
+                               produce: Callable[[], Awaitable[bytes]]) -> Response:
+    key, entry = None, None
+    try:
+        key, entry = await _lookup(owner_id, name)
+    except RedisError as e:
+        response_cache_stats["errors"] += 1
+        print(f"Response cache read failed: {e}")
+
+    if entry:
+        response_cache_stats["hits"] += 1
+        etag, body = entry["etag"], entry["body"].encode("utf-8")
+    else:
+        response_cache_stats["misses"] += 1
+        body = await produce()
+        etag = make_etag(body)
+        if key is not None:
+            try:
+                await _store(key, etag, body)
+            except RedisError as e:
+                response_cache_stats["errors"] += 1
+                print(f"Response cache write failed: {e}")
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        response_cache_stats["not_modified"] += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def get_response_cache_stats() -> dict:
+    return dict(response_cache_stats)
@@ -0,0 +1,275 @@
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import Date, DateTime
+
+from src.cache.redis_client import redis_client
+from src.conf.config import settings
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+_MISSING = object()
+
+# Writes a loaded value back only if the key's generation is still the one read before loading;
+# an invalidation in between bumps it, so a stale load cannot overwrite it.
+GUARDED_SET_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class LocalLRU:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class TieredCache:
+    def __init__(self, redis, default_maxsize: int, local_ttl: float, redis_ttl: int):
+        self.redis = redis
+        self.default_maxsize = default_maxsize
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.namespaces: dict[str, LocalLRU] = {}
+        self.redis_hits: dict[str, int] = {}
+        # Bumped by every invalidation seen in a namespace, local or from another worker.
+        self.epochs: dict[str, int] = {}
+        self.stale_writes: dict[str, int] = {}
+        self._guarded_set = redis.register_script(GUARDED_SET_SCRIPT)
+
+    def namespace(self, name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None) -> LocalLRU:
+        if name not in self.namespaces:
+            self.namespaces[name] = LocalLRU(maxsize or self.default_maxsize, ttl or self.local_ttl)
+            self.redis_hits[name] = 0
+            self.epochs[name] = 0
+            self.stale_writes[name] = 0
+        return self.namespaces[name]
+
+    @staticmethod
+    def _redis_key(namespace: str, key: str) -> str:
+        return f"tc:{namespace}:{key}"
+
+    @staticmethod
+    def _generation_key(namespace: str, key: str) -> str:
+        return f"tcgen:{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> Tuple[Any, Optional[tuple]]:
+        # Returns the value, or _MISSING and the generation to hand to set() after loading.
+        local = self.namespace(namespace)
+        value = local.get(key)
+        if value is not _MISSING:
+            return value, None
+        epoch = self.epochs[namespace]
+        try:
+            raw, generation = await self.redis.mget(
+                self._redis_key(namespace, key), self._generation_key(namespace, key)
+            )
+        except RedisError as e:
+            print(f"Tiered cache read failed: {e}")
+            return _MISSING, (epoch, None)
+        if raw is None:
+            return _MISSING, (epoch, generation or "0")
+        self.redis_hits[namespace] += 1
+        local.set(key, raw)
+        return raw, None
+
+    async def set(self, namespace: str, key: str, raw: str, generation: tuple) -> None:
+        epoch, redis_generation = generation
+        if self.epochs[namespace] != epoch:
+            self.stale_writes[namespace] += 1
+            return
+        if redis_generation is not None:
+            try:
+                written = await self._guarded_set(
+                    keys=[self._redis_key(namespace, key), self._generation_key(namespace, key)],
+                    args=[redis_generation, raw, self.redis_ttl],
+                )
+            except RedisError as e:
+                print(f"Tiered cache write failed: {e}")
+            else:
+                if not written:
+                    self.stale_writes[namespace] += 1
+                    return
+        # Re-checked: another worker's invalidation may have arrived during the write.
+        if self.epochs[namespace] == epoch:
+            self.namespace(namespace).set(key, raw)
+
+    async def invalidate(self, namespace: str, *keys: str) -> None:
+        # One transaction and one message however many keys are dropped. Generations outlive
+        # the values they guard, so a load started before the invalidation cannot write back.
+        if not keys:
+            return
+        self._evict(namespace, keys)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(*(self._redis_key(namespace, key) for key in keys))
+                for key in keys:
+                    pipe.incr(self._generation_key(namespace, key))
+                    pipe.expire(self._generation_key(namespace, key), self.redis_ttl)
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps([namespace, *keys]))
+                await pipe.execute()
+        except RedisError as e:
+            print(f"Tiered cache invalidation failed: {e}")
+
+    def _evict(self, namespace: str, keys: Sequence[str]) -> None:
+        local = self.namespace(namespace)
+        self.epochs[namespace] += 1
+        for key in keys:
+            local.delete(key)
+
+    async def listen(self) -> None:
+        # Evicts entries invalidated by other workers; runs for the lifetime of the app.
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    namespace, *keys = json.loads(message["data"])
+                    if namespace in self.namespaces:
+                        self._evict(namespace, keys)
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except RedisError as e:
+                print(f"Cache invalidation listener lost Redis connection: {e}")
+                # Anything published while disconnected is lost, so start from a clean slate.
+                for name, local in self.namespaces.items():
+                    self.epochs[name] += 1
+                    local.clear()
+                await pubsub.close()
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {
+            name: {**local.stats(), "redis_hits": self.redis_hits[name], "stale_writes": self.stale_writes[name]}
+            for name, local in self.namespaces.items()
+        }
+
+
+tiered_cache = TieredCache(
+    redis_client,
+    default_maxsize=settings.cache_local_maxsize,
+    local_ttl=settings.cache_local_ttl,
+    redis_ttl=settings.cache_redis_ttl,
+)
+
+
+def dump_model(instance, exclude: Sequence[str] = ()) -> str:
+    data = {}
+    for column in instance.__table__.columns:
+        if column.key in exclude:
+            continue
+        value = getattr(instance, column.key)
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        data[column.key] = value
+    return json.dumps(data)
+
+
+def load_model(model_cls) -> Callable[[str], Any]:
+    columns = {column.key: column for column in model_cls.__table__.columns}
+
+    def load(raw: str):
+        data = json.loads(raw)
+        for name, value in data.items():
+            if value is None:
+                continue
+            column_type = columns[name].type
+            if isinstance(column_type, DateTime):
+                data[name] = datetime.fromisoformat(value)
+            elif isinstance(column_type, Date):
+                data[name] = date.fromisoformat(value)
+        return model_cls(**data)
+
+    return load
+
+
+def cached(namespace: str, key: Sequence[str], dump: Callable[[Any], str], load: Callable[[str], Any],
+           maxsize: Optional[int] = None, ttl: Optional[float] = None):
+    # `key` names the arguments that identify the result; None results are never cached.
+    def decorator(func):
+        signature = inspect.signature(func)
+        tiered_cache.namespace(namespace, maxsize, ttl)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            cache_key = ":".join(str(bound.arguments[name]) for name in key)
+            raw, generation = await tiered_cache.get(namespace, cache_key)
+            if raw is not _MISSING:
+                return load(raw)
+            result = await func(*args, **kwargs)
+            if result is not None:
+                await tiered_cache.set(namespace, cache_key, dump(result), generation)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+async def invalidate(namespace: str, *parts) -> None:
+    await tiered_cache.invalidate(namespace, ":".join(str(part) for part in parts))
+
+
+async def invalidate_many(namespace: str, keys: Sequence[Sequence]) -> None:
+    await tiered_cache.invalidate(namespace, *(":".join(str(part) for part in parts) for parts in keys))
+
+
+def get_cache_stats() -> dict:
+    return tiered_cache.stats()
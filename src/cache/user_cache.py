@@ -0,0 +1,66 @@
+import json
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from src.cache.redis_client import redis_client
+from src.conf.config import settings
+from src.database.models import User
+
+USER_CACHE_PREFIX = "user:email:"
+
+user_cache_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def _key(email: str) -> str:
+    return f"{USER_CACHE_PREFIX}{email.lower()}"
+
+
+def serialize_user(user: User) -> str:
+    return json.dumps({
+        "id": user.id,
+        "email": user.email,
+        "is_verified": bool(user.is_verified),
+        "avatar": user.avatar,
+    })
+
+
+def deserialize_user(raw: str) -> User:
+    # Detached instance: enough for dependencies that only read id/email/is_verified/avatar.
+    return User(**json.loads(raw))
+
+
+async def get_cached_user(email: str) -> Optional[User]:
+    try:
+        raw = await redis_client.get(_key(email))
+    except RedisError as e:
+        user_cache_stats["errors"] += 1
+        print(f"User cache read failed: {e}")
+        return None
+    if raw is None:
+        user_cache_stats["misses"] += 1
+        return None
+    user_cache_stats["hits"] += 1
+    return deserialize_user(raw)
+
+
+async def cache_user(user: User) -> None:
+    try:
+        await redis_client.set(_key(user.email), serialize_user(user), ex=settings.user_cache_ttl)
+    except RedisError as e:
+        user_cache_stats["errors"] += 1
+        print(f"User cache write failed: {e}")
+
+
+async def invalidate_user(email: str) -> None:
+    try:
+        await redis_client.delete(_key(email))
+    except RedisError as e:
+        user_cache_stats["errors"] += 1
+        print(f"User cache invalidation failed: {e}")
+
+
+def get_user_cache_stats() -> dict:
+    lookups = user_cache_stats["hits"] + user_cache_stats["misses"]
+    hit_ratio = user_cache_stats["hits"] / lookups if lookups else 0.0
+    return {**user_cache_stats, "hit_ratio": round(hit_ratio, 4)}
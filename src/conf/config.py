@@ -13,13 +13,36 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_minutes: int = 30
     refresh_token_expire_days: int = 7
+    token_cache_size: int = 10_000
+    verification_token_store: str = "redis"
+    verification_token_ttl: int = 2 * 3600
+    verification_token_purge_batch_size: int = 5000
+
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 32
     debug: bool = False
+
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_query_cache_size: int = 500
     base_url: AnyHttpUrl
 
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
 
+    avatar_storage: str = "cloudinary"
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_size: int = 256
+    avatar_workers: int = 2
+    media_root: str = "media"
+    media_url: str = "/media"
+
     mail_username: str
     mail_password: str
     mail_from: str
@@ -27,10 +50,47 @@ class Settings(BaseSettings):
     mail_server: str
     mail_starttls: bool
     mail_ssl: bool
+    mail_smtp_timeout: float = 30
+    mail_worker_concurrency: int = 2
+    mail_max_attempts: int = 6
+    mail_retry_base_seconds: float = 10
+    mail_retry_max_seconds: float = 3600
 
     redis_host: str
     redis_port: int = 6379
 
+    user_cache_ttl: int = 300
+    cache_local_maxsize: int = 1024
+    cache_local_ttl: float = 30
+    cache_redis_ttl: int = 300
+    response_cache_ttl: int = 600
+
+    contacts_page_size: int = 50
+    contacts_page_max_size: int = 100
+    birthdays_window_days: int = 7
+
+    contacts_import_batch_size: int = 1000
+    contacts_import_max_rows: int = 100_000
+    contacts_import_max_errors: int = 1000
+    # Characters; longer lines (and quoted CSV fields spanning more) are not buffered.
+    contacts_import_max_record_length: int = 64 * 1024
+    contacts_batch_max_size: int = 1000
+
+    metrics_enabled: bool = True
+    server_timing_header: bool = True
+
+    # "<requests>/<seconds>" sliding windows; login is per account and per IP, contact
+    # routes are per authenticated user, register and refresh per IP.
+    rate_limit_enabled: bool = True
+    rate_limit_login: str = "5/300"
+    rate_limit_login_ip: str = "30/300"
+    rate_limit_register: str = "10/3600"
+    rate_limit_refresh: str = "30/60"
+    rate_limit_contacts_create: str = "5/60"
+    rate_limit_contacts_import: str = "2/60"
+    rate_limit_contacts_search: str = "60/60"
+    rate_limit_contacts_batch: str = "10/60"
+
     base_url: str
 
 settings = Settings()
@@ -1,10 +1,32 @@
+from typing import Awaitable, Callable
+
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from src.conf.config import settings
+from src.database.pool import InstrumentedQueuePool
+
 
+def _engine_options() -> dict:
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "query_cache_size": settings.db_query_cache_size,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+    return options
 
-engine = create_async_engine(settings.database_url)
+
+engine = create_async_engine(settings.database_url, **_engine_options())
 
 AsyncSessionLocal = sessionmaker(
     autocommit=False,
@@ -16,9 +38,54 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+AFTER_COMMIT = "after_commit"
+AFTER_ROLLBACK = "after_rollback"
+
+
+def after_commit(db: AsyncSession, callback: Callable[..., Awaitable], *args) -> None:
+    # Cache invalidation and other side effects wait for the data they describe to be committed.
+    # Identical callbacks registered twice in one unit of work run once.
+    db.info.setdefault(AFTER_COMMIT, {})[(callback, args)] = None
+
+
+def after_rollback(db: AsyncSession, callback: Callable[..., Awaitable], *args) -> None:
+    # Undoes side effects taken outside the database (e.g. a claimed Redis token) when the
+    # unit of work is rolled back instead of committed.
+    db.info.setdefault(AFTER_ROLLBACK, {})[(callback, args)] = None
+
+
+async def _run_callbacks(callbacks: dict, stage: str) -> None:
+    # A failing side effect is logged and the rest still run.
+    for callback, args in callbacks:
+        try:
+            await callback(*args)
+        except Exception as e:
+            print(f"{stage} callback {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+
+async def commit(db: AsyncSession) -> None:
+    await db.commit()
+    db.info.pop(AFTER_ROLLBACK, None)
+    # The data is saved by now, so nothing after this point may fail the request.
+    await _run_callbacks(db.info.pop(AFTER_COMMIT, {}), "After-commit")
+
+
+async def rollback(db: AsyncSession) -> None:
+    db.info.pop(AFTER_COMMIT, None)
+    callbacks = db.info.pop(AFTER_ROLLBACK, {})
+    await db.rollback()
+    await _run_callbacks(callbacks, "After-rollback")
+
+
 async def get_db():
+    # One unit of work per request: repositories only execute statements, the commit happens
+    # here once the endpoint returns, and any exception rolls the whole request back.
     db = AsyncSessionLocal()
     try:
         yield db
+        await commit(db)
+    except BaseException:
+        await rollback(db)
+        raise
     finally:
         await db.close()
\ No newline at end of file
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Boolean, Index, extract, literal_column
+from sqlalchemy.orm import relationship, synonym
 from datetime import datetime
 from src.database.db import Base
 
@@ -17,6 +17,9 @@ class User(Base):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(50), index=True)
@@ -29,6 +32,18 @@ class Contact(Base):
     owner_id = Column(Integer, ForeignKey("user.id"))
     owner = relationship("User", back_populates="contacts")
 
+    # Names used by the API schemas.
+    phone_number = synonym("phone")
+    user_id = synonym("owner_id")
+
+
+# Month/day of the birthday as MMDD (e.g. 1231). The literal keeps the query
+# expression identical to the indexed one so the planner can use the index.
+contact_birthday_key = (
+    extract("month", Contact.birthday) * literal_column("100") + extract("day", Contact.birthday)
+)
+Index("ix_contacts_owner_birthday_key", Contact.owner_id, contact_birthday_key)
+
 
 class VerificationToken(Base):
     __tablename__ = "verification_tokens"
@@ -37,7 +52,7 @@ class VerificationToken(Base):
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     token = Column(String(255), unique=True, index=True, nullable=False)
     token_type = Column(String(50), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User")
\ No newline at end of file
@@ -0,0 +1,55 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+pool_stats = {
+    "checkouts": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "overflow_events": 0,
+    "timeouts": 0,
+}
+
+
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats["checkouts"] += 1
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # Records how long callers wait for a connection and how often the pool grows past pool_size.
+    # Checkouts come from the pool's checkout event, so only connections actually handed out
+    # count; callers that time out are counted under timeouts and not in the wait figures.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # recreate() (e.g. engine.dispose()) hands the old pool's listeners over in _dispatch.
+        if kwargs.get("_dispatch") is None:
+            event.listen(self, "checkout", _count_checkout)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        overflow_before = self._overflow
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        pool_stats["wait_seconds_total"] += waited
+        pool_stats["wait_seconds_max"] = max(pool_stats["wait_seconds_max"], waited)
+        if self._overflow > max(overflow_before, 0):
+            pool_stats["overflow_events"] += 1
+        return connection
+
+
+def get_pool_stats(engine) -> dict:
+    pool = engine.sync_engine.pool
+    stats = dict(pool_stats)
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
@@ -1,6 +1,9 @@
+import asyncio
+import os
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
 import cloudinary
 import cloudinary.uploader
 import redis.asyncio as redis # Імпорт асинхронного Redis
@@ -10,8 +13,16 @@ from src.conf.config import settings
 from src.routes import auth, contact, users
 
 from src.cache.redis_client import redis_client
+from src.cache.tiered import tiered_cache
 
 from src.database.db import Base, engine
+from src.database.pool import get_pool_stats
+from src.services.avatars import MULTIPART_OVERHEAD
+from src.services.body_limit import BodySizeLimitMiddleware
+from src.services.mail_queue import queue_depth
+from src.monitoring.instrumentation import install_redis_hooks, install_sql_hooks
+from src.monitoring.middleware import MetricsMiddleware
+from src.monitoring.exposition import render_metrics
 
 app = FastAPI(
     title="Contacts API",
@@ -32,20 +43,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Oversized uploads are refused before Starlette spools the multipart body.
+app.add_middleware(BodySizeLimitMiddleware, limits={"/users/avatar": settings.avatar_max_bytes + MULTIPART_OVERHEAD})
+
+if settings.metrics_enabled:
+    install_sql_hooks(engine)
+    install_redis_hooks(redis_client)
+    # Added last so it wraps everything else, CORS included.
+    app.add_middleware(MetricsMiddleware, server_timing_header=settings.server_timing_header)
+
 app.include_router(auth.router)
 app.include_router(contact.router)
 app.include_router(users.router)
 
+if settings.avatar_storage == "local":
+    os.makedirs(settings.media_root, exist_ok=True)
+    app.mount(settings.media_url, StaticFiles(directory=settings.media_root), name="media")
+
 
 @app.on_event("startup")
 async def startup_event():
     print("Starting up application...")
 
-    try:
-        await FastAPILimiter.init(redis_client)
-        print("FastAPILimiter initialized with Redis.")
-    except Exception as e:
-        print(f"Error initializing FastAPILimiter: {e}")
+    app.state.cache_listener = asyncio.create_task(tiered_cache.listen())
+    print("Cache invalidation listener started.")
 
     cloudinary.config(
         cloud_name=settings.cloudinary_name,
@@ -60,6 +81,24 @@ async def startup_event():
         print("Database tables created/checked.")
     print("Application startup complete.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.cache_listener.cancel()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    return PlainTextResponse(await render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/db-pool")
+async def db_pool_metrics():
+    return get_pool_stats(engine)
+
+@app.get("/metrics/mail-queue")
+async def mail_queue_metrics():
+    return await queue_depth()
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Contacts API!"}
\ No newline at end of file
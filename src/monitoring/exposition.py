@@ -0,0 +1,30 @@
+from redis.exceptions import RedisError
+
+from src.auth.tokens import get_token_stats
+from src.cache.rate_limit import rate_limiter
+from src.cache.response_cache import get_response_cache_stats
+from src.cache.tiered import get_cache_stats
+from src.cache.user_cache import get_user_cache_stats
+from src.database.db import engine
+from src.database.pool import get_pool_stats
+from src.monitoring.metrics import Exposition, write_request_metrics
+from src.services.mail_queue import queue_depth
+from src.services.passwords import password_hasher
+
+
+async def render_metrics() -> str:
+    out = Exposition()
+    write_request_metrics(out)
+    out.gauges("db_pool", "Database connection pool", [({}, get_pool_stats(engine))])
+    out.gauges("tiered_cache", "Tiered cache",
+               [({"namespace": namespace}, stats) for namespace, stats in get_cache_stats().items()])
+    out.gauges("user_cache", "Authenticated user cache", [({}, get_user_cache_stats())])
+    out.gauges("response_cache", "Response cache", [({}, get_response_cache_stats())])
+    out.gauges("auth_tokens", "Token verification", [({}, get_token_stats())])
+    out.gauges("password_hasher", "bcrypt worker pool", [({}, password_hasher.stats())])
+    out.gauges("rate_limit", "Rate limit checks", [({}, rate_limiter.stats())])
+    try:
+        out.gauges("mail_queue", "Outbound mail queue", [({}, await queue_depth())])
+    except RedisError as e:
+        print(f"Could not read mail queue depth for metrics: {e}")
+    return out.render()
@@ -0,0 +1,98 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.monitoring.metrics import totals
+
+QUERY_STARTED = "monitoring_query_started"
+
+
+class RequestTimings:
+    __slots__ = ("db_statements", "db_seconds", "redis_commands", "redis_seconds")
+
+    def __init__(self):
+        self.db_statements = 0
+        self.db_seconds = 0.0
+        self.redis_commands = 0
+        self.redis_seconds = 0.0
+
+
+# Set by the middleware for the lifetime of one request. SQLAlchemy runs cursor events in a
+# greenlet that shares the calling task's context, so the hooks below see the same object.
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(QUERY_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[QUERY_STARTED].pop()
+    totals["db_statements"] += 1
+    totals["db_seconds"] += elapsed
+    timings = current_timings.get()
+    if timings is not None:
+        timings.db_statements += 1
+        timings.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for a failed statement; drop its start time.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(QUERY_STARTED):
+        conn.info[QUERY_STARTED].pop()
+
+
+def install_sql_hooks(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _record_redis(elapsed: float) -> None:
+    totals["redis_commands"] += 1
+    totals["redis_seconds"] += elapsed
+    timings = current_timings.get()
+    if timings is not None:
+        timings.redis_commands += 1
+        timings.redis_seconds += elapsed
+
+
+def install_redis_hooks(client) -> None:
+    # redis-py has no command hooks, so the client's entry points are wrapped in place. Commands
+    # go through execute_command; a pipeline is timed as one round trip when it executes.
+    if getattr(client, "_monitoring_installed", False):
+        return
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def timed_execute_command(*args, **options):
+        started = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            _record_redis(time.perf_counter() - started)
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def timed_execute(*execute_args, **execute_kwargs):
+            started = time.perf_counter()
+            try:
+                return await execute(*execute_args, **execute_kwargs)
+            finally:
+                _record_redis(time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+    client._monitoring_installed = True
@@ -0,0 +1,146 @@
+import bisect
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((format_value(bound), total))
+        rows.append(("+Inf", self.count))
+        return rows
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = 0.0
+        self.redis_commands = 0
+        self.redis_seconds = 0.0
+        self.response_bytes = 0
+
+
+# Keyed by (method, route template, status code). Route templates, not raw paths, keep
+# the label set bounded.
+route_metrics: Dict[Tuple[str, str, str], RouteMetrics] = defaultdict(RouteMetrics)
+
+# Everything the process sent, including work done outside a request (listeners, startup).
+totals = {
+    "db_statements": 0,
+    "db_seconds": 0.0,
+    "redis_commands": 0,
+    "redis_seconds": 0.0,
+}
+
+
+def record_request(method: str, route: str, status: int, seconds: float, timings, response_bytes: int) -> None:
+    metrics = route_metrics[(method, route, str(status))]
+    metrics.latency.observe(seconds)
+    metrics.db_statements.observe(timings.db_statements)
+    metrics.db_seconds += timings.db_seconds
+    metrics.redis_commands += timings.redis_commands
+    metrics.redis_seconds += timings.redis_seconds
+    metrics.response_bytes += response_bytes
+
+
+def format_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class Exposition:
+    # Prometheus text format 0.0.4, written by hand to avoid pulling in a client library.
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, **labels) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {format_value(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, **labels) -> None:
+        for bound, count in histogram.cumulative():
+            self.sample(f"{name}_bucket", count, **labels, le=bound)
+        self.sample(f"{name}_sum", float(histogram.sum), **labels)
+        self.sample(f"{name}_count", histogram.count, **labels)
+
+    def gauges(self, prefix: str, help_text: str, rows: Sequence[Tuple[Dict, Dict]]) -> None:
+        # rows are (labels, stats) pairs; every numeric stat becomes a gauge named prefix_key.
+        keys = []
+        for _, stats in rows:
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and key not in keys:
+                    keys.append(key)
+        for key in keys:
+            name = f"{prefix}_{key}"
+            self.family(name, "gauge", f"{help_text}: {key}.")
+            for labels, stats in rows:
+                if key in stats:
+                    self.sample(name, stats[key], **labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def write_request_metrics(out: Exposition) -> None:
+    items = sorted(route_metrics.items(), key=lambda item: item[0])
+
+    out.family("http_request_duration_seconds", "histogram", "Request latency by route.")
+    for (method, route, status), metrics in items:
+        out.histogram("http_request_duration_seconds", metrics.latency, method=method, route=route, status=status)
+
+    out.family("http_request_db_statements", "histogram", "SQL statements executed per request.")
+    for (method, route, status), metrics in items:
+        out.histogram("http_request_db_statements", metrics.db_statements, method=method, route=route, status=status)
+
+    counters = (
+        ("http_request_db_seconds_total", "Time spent in SQL statements.", "db_seconds"),
+        ("http_request_redis_commands_total", "Redis commands and pipelines sent.", "redis_commands"),
+        ("http_request_redis_seconds_total", "Time spent waiting on Redis.", "redis_seconds"),
+        ("http_response_size_bytes_total", "Response body bytes sent.", "response_bytes"),
+    )
+    for name, help_text, attribute in counters:
+        out.family(name, "counter", help_text)
+        for (method, route, status), metrics in items:
+            out.sample(name, getattr(metrics, attribute), method=method, route=route, status=status)
+
+    out.family("process_db_statements_total", "counter", "SQL statements executed by the process.")
+    out.sample("process_db_statements_total", totals["db_statements"])
+    out.family("process_db_seconds_total", "counter", "Time the process spent in SQL statements.")
+    out.sample("process_db_seconds_total", totals["db_seconds"])
+    out.family("process_redis_commands_total", "counter", "Redis commands and pipelines sent by the process.")
+    out.sample("process_redis_commands_total", totals["redis_commands"])
+    out.family("process_redis_seconds_total", "counter", "Time the process spent waiting on Redis.")
+    out.sample("process_redis_seconds_total", totals["redis_seconds"])
@@ -0,0 +1,61 @@
+import time
+
+from src.monitoring.instrumentation import RequestTimings, current_timings
+from src.monitoring.metrics import record_request
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def server_timing(timings: RequestTimings, elapsed: float) -> str:
+    return ", ".join([
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="statements={timings.db_statements}"',
+        f'redis;dur={timings.redis_seconds * 1000:.1f};desc="commands={timings.redis_commands}"',
+        f"app;dur={elapsed * 1000:.1f}",
+    ])
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware so streaming responses pass through untouched.
+    # Server-Timing is written with the response headers, so for a streamed body it covers the
+    # work done before the first byte; the recorded metrics cover the whole response.
+    def __init__(self, app, server_timing_header: bool = True):
+        self.app = app
+        self.server_timing_header = server_timing_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing_header:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(timings, time.perf_counter() - started).encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_timings.reset(token)
+            # The router stores the matched route in the scope it was given.
+            route = scope.get("route")
+            record_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                time.perf_counter() - started,
+                timings,
+                response_bytes,
+            )
@@ -2,11 +2,12 @@ from sqlalchemy.ext.asyncio import  AsyncSession
 from sqlalchemy import select, delete
 from src.database import models
 from typing import Optional
+from datetime import datetime
 
 async def create_verification_token(token_db: models.VerificationToken, db:AsyncSession) -> models.VerificationToken:
+    # Flushed, not committed: the request's unit of work commits it with the rest.
     db.add(token_db)
-    await db.commit()
-    await db.refresh(token_db)
+    await db.flush()
     return token_db
 
 async def get_verification_token(token: str, token_type, db: AsyncSession) -> Optional[models.VerificationToken]:
@@ -21,4 +22,19 @@ async def get_verification_token(token: str, token_type, db: AsyncSession) -> Op
 async def delete_verification_token(token_id: int, db: AsyncSession) -> None:
     stmt = delete(models.VerificationToken).where(models.VerificationToken.id == token_id)
     await db.execute(stmt)
-    await db.commit()
\ No newline at end of file
+
+async def consume_verification_token(token: str, token_type: str, db: AsyncSession) -> Optional[int]:
+    # Single DELETE ... RETURNING: a token can only be redeemed once, even by concurrent requests.
+    table = models.VerificationToken.__table__
+    stmt = (
+        delete(table)
+        .where(table.c.token == token, table.c.token_type == token_type, table.c.expires_at > datetime.utcnow())
+        .returning(table.c.user_id)
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+async def purge_expired_verification_tokens(db: AsyncSession, before: datetime, batch_size: int) -> int:
+    table = models.VerificationToken.__table__
+    expired = select(table.c.id).where(table.c.expires_at < before).limit(batch_size).scalar_subquery()
+    result = await db.execute(delete(table).where(table.c.id.in_(expired)))
+    return result.rowcount
@@ -1,20 +1,52 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import or_, select
+from sqlalchemy import and_, case, delete, insert, or_, select, update
 from datetime import date, timedelta
+from typing import List, Optional, Set, Tuple
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from src.database import models
-from src.schemas.contact import ContactCreate, ContactUpdate
+from src.database.db import after_commit
+from src.schemas.contact import ContactCreate, ContactPatch, ContactUpdate
+from src.cache.tiered import cached, invalidate, invalidate_many, dump_model, load_model
+from src.cache.response_cache import bump_owner_version
+from src.repository import search
 
 
 async def create_contact(db: AsyncSession, contact: ContactCreate, user_id: int):
-    db_contact = models.Contact(**contact.model_dump(), owner_id=user_id)
-    db.add(db_contact)
-    await db.commit()
-    await db.refresh(db_contact)
+    stmt = insert(models.Contact).values(**_contact_values(contact, user_id)).returning(models.Contact)
+    db_contact = (await db.execute(stmt)).scalar_one()
+    after_commit(db, bump_owner_version, user_id)
     return db_contact
 
+def _column_values(values: dict) -> dict:
+    if "phone_number" in values:
+        values["phone"] = values.pop("phone_number")
+    return values
 
+def _contact_values(contact: ContactCreate, user_id: int) -> dict:
+    values = _column_values(contact.model_dump())
+    values["owner_id"] = user_id
+    return values
 
-async def get_contact(db: AsyncSession, contact_id: int, user_id: int):
+async def bulk_insert_contacts(db: AsyncSession, contacts: List[ContactCreate], user_id: int) -> Set[str]:
+    # INSERT ... ON CONFLICT (email) DO NOTHING RETURNING email, executed with a parameter list so
+    # SQLAlchemy batches it into multi-row VALUES statements from one cached compilation.
+    if not contacts:
+        return set()
+    insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = (
+        insert(models.Contact.__table__)
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(models.Contact.__table__.c.email)
+    )
+    result = await db.execute(stmt, [_contact_values(contact, user_id) for contact in contacts])
+    inserted = set(result.scalars().all())
+    if inserted:
+        after_commit(db, bump_owner_version, user_id)
+    return inserted
+
+
+async def _select_contact(db: AsyncSession, contact_id: int, user_id: int):
     result = await db.execute(
         select(models.Contact).filter(
             models.Contact.id == contact_id,
@@ -24,6 +56,11 @@ async def get_contact(db: AsyncSession, contact_id: int, user_id: int):
     return result.scalar_one_or_none()
 
 
+@cached("contacts", key=("user_id", "contact_id"), dump=dump_model, load=load_model(models.Contact), maxsize=4096)
+async def get_contact(db: AsyncSession, contact_id: int, user_id: int):
+    return await _select_contact(db, contact_id, user_id)
+
+
 async def get_contacts(db: AsyncSession, user_id: int, skip: int = 0, limit: int =100):
     result = await db.execute(
         select(models.Contact).filter(models.Contact.owner_id == user_id).offset(skip).limit(limit)
@@ -31,42 +68,158 @@ async def get_contacts(db: AsyncSession, user_id: int, skip: int = 0, limit: int
     return result.scalars().all()
 
 
+async def get_contacts_page(db: AsyncSession, user_id: int, limit: int, after_id: Optional[int] = None,
+                            before_id: Optional[int] = None):
+    # Keyset pagination over (owner_id, id): served by ix_contacts_owner_id_id at any depth.
+    stmt = select(models.Contact).filter(models.Contact.owner_id == user_id)
+    if before_id is not None:
+        stmt = stmt.filter(models.Contact.id < before_id).order_by(models.Contact.id.desc())
+    else:
+        if after_id is not None:
+            stmt = stmt.filter(models.Contact.id > after_id)
+        stmt = stmt.order_by(models.Contact.id.asc())
+    result = await db.execute(stmt.limit(limit + 1))
+    contacts = list(result.scalars().all())
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+    if before_id is not None:
+        contacts.reverse()
+    return contacts, has_more
+
+
 async def update_contact(db: AsyncSession, contact_id: int, updated: ContactUpdate, user_id: int):
-    contact = await get_contact(db, contact_id, user_id)
+    stmt = (
+        update(models.Contact)
+        .where(models.Contact.id == contact_id, models.Contact.owner_id == user_id)
+        .values(**_column_values(updated.model_dump(exclude_unset=True)))
+        .returning(models.Contact)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    contact = (await db.execute(stmt)).scalar_one_or_none()
     if contact:
-        for key, value in updated.model_dump(exclude_unset=True).items():
-            setattr(contact, key, value)
-        await db.commit()
-        await db.refresh(contact)
+        after_commit(db, invalidate, "contacts", user_id, contact_id)
+        after_commit(db, bump_owner_version, user_id)
     return contact
 
 async def delete_contact(db: AsyncSession, contact_id: int, user_id: int):
-    contact = await get_contact(db, contact_id, user_id)
+    stmt = (
+        delete(models.Contact)
+        .where(models.Contact.id == contact_id, models.Contact.owner_id == user_id)
+        .returning(models.Contact)
+        .execution_options(synchronize_session=False)
+    )
+    contact = (await db.execute(stmt)).scalar_one_or_none()
     if contact:
-        await db.delete(contact)
-        await db.commit()
+        after_commit(db, invalidate, "contacts", user_id, contact_id)
+        after_commit(db, bump_owner_version, user_id)
     return contact
 
-async def search_contacts(db: AsyncSession, query: str, user_id: int):
-    result = await db.execute(
-        select(models.Contact).filter(
-            models.Contact.owner_id == user_id,
-            or_(
-                models.Contact.first_name.ilike(f"%{query}%"),
-                models.Contact.last_name.ilike(f"%{query}%"),
-                models.Contact.email.ilike(f"%{query}%")
-            )
-        )
+def _after_batch(db: AsyncSession, user_id: int, contact_ids: Set[int]) -> None:
+    if contact_ids:
+        keys = tuple((user_id, contact_id) for contact_id in sorted(contact_ids))
+        after_commit(db, invalidate_many, "contacts", keys)
+        after_commit(db, bump_owner_version, user_id)
+
+async def update_contacts(db: AsyncSession, contact_ids: List[int], changes: ContactPatch, user_id: int) -> Set[int]:
+    # One owner-scoped UPDATE ... WHERE id IN (...) RETURNING id; ids owned by someone else
+    # are indistinguishable from missing ones.
+    values = _column_values(changes.model_dump(exclude_unset=True))
+    table = models.Contact.__table__
+    stmt = (
+        update(table)
+        .where(table.c.owner_id == user_id, table.c.id.in_(contact_ids))
+        .values(**values)
+        .returning(table.c.id)
     )
-    return result.scalars().all()
+    result = await db.execute(stmt)
+    updated = set(result.scalars().all())
+    _after_batch(db, user_id, updated)
+    return updated
+
+async def delete_contacts(db: AsyncSession, contact_ids: List[int], user_id: int) -> Set[int]:
+    table = models.Contact.__table__
+    stmt = (
+        delete(table)
+        .where(table.c.owner_id == user_id, table.c.id.in_(contact_ids))
+        .returning(table.c.id)
+    )
+    result = await db.execute(stmt)
+    deleted = set(result.scalars().all())
+    _after_batch(db, user_id, deleted)
+    return deleted
+
+async def search_contacts(db: AsyncSession, query: str, user_id: int, limit: int = 100):
+    rows, _ = await search_contacts_page(db, user_id, query, limit)
+    return [contact for contact, _ in rows]
+
+async def search_contacts_page(db: AsyncSession, user_id: int, query: str, limit: int,
+                               after: Optional[Tuple[float, int]] = None, before: Optional[Tuple[float, int]] = None):
+    # Results are ordered by (rank DESC, id ASC); cursors carry the (rank, id) of the boundary row.
+    terms = search.tokenize(query)
+    rank = search.rank_expr(terms, db.bind.dialect.name)
+    stmt = select(models.Contact, rank.label("rank")).filter(
+        models.Contact.owner_id == user_id,
+        search.match_filter(terms)
+    )
+    if before is not None:
+        before_rank, before_id = before
+        stmt = stmt.filter(or_(rank > before_rank, and_(rank == before_rank, models.Contact.id < before_id)))
+        stmt = stmt.order_by(rank.asc(), models.Contact.id.desc())
+    else:
+        if after is not None:
+            after_rank, after_id = after
+            stmt = stmt.filter(or_(rank < after_rank, and_(rank == after_rank, models.Contact.id > after_id)))
+        stmt = stmt.order_by(rank.desc(), models.Contact.id.asc())
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = [(contact, row_rank) for contact, row_rank in result.all()]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+    return rows, has_more
 
-async def get_upcoming_birthdays(db: AsyncSession, user_id: int):
+def _birthday_key(day: date) -> int:
+    return day.month * 100 + day.day
+
+def _is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def _birthday_window_filter(start: date, days: int):
+    key = models.contact_birthday_key
+    end = start + timedelta(days=days)
+    start_key, end_key = _birthday_key(start), _birthday_key(end)
+    if end.year == start.year:
+        window = key.between(start_key, end_key)
+    else:
+        window = or_(key >= start_key, key <= end_key)
+    # Feb 29 birthdays are celebrated on Mar 1 in non-leap years.
+    for year in range(start.year, end.year + 1):
+        march_first = date(year, 3, 1)
+        if not _is_leap(year) and start <= march_first <= end:
+            window = or_(window, key == 229)
+    return window
+
+def _celebrated_birthday_key(today: date):
+    # The birthday key with Feb 29 moved to Mar 1 whenever its next occurrence falls in a
+    # non-leap year, as in _birthday_window_filter.
+    key = models.contact_birthday_key
+    feb_29 = 229 if _is_leap(today.year) else 301
+    if feb_29 < _birthday_key(today):
+        feb_29 = 229 if _is_leap(today.year + 1) else 301
+    if feb_29 == 229:
+        return key
+    return case((key == 229, 301), else_=key)
+
+async def get_upcoming_birthdays(db: AsyncSession, user_id: int, days: int = 7):
     today = date.today()
-    next_week = today + timedelta(days=7)
-    result = await db.execute(
-        select(models.Contact).filter(
-            models.Contact.owner_id == user_id,
-            models.Contact.birthday.between(today, next_week)
-        )
+    stmt = select(models.Contact).filter(
+        models.Contact.owner_id == user_id,
+        models.Contact.birthday.isnot(None)
     )
+    if days < 365:
+        stmt = stmt.filter(_birthday_window_filter(today, days))
+    # Upcoming first: the rest of this year, then the part of the window after New Year.
+    key = _celebrated_birthday_key(today)
+    stmt = stmt.order_by(case((key >= _birthday_key(today), 0), else_=1), key, models.Contact.id)
+    result = await db.execute(stmt)
     return result.scalars().all()
@@ -0,0 +1,37 @@
+from functools import reduce
+from typing import List
+
+from sqlalchemy import Float, and_, case, cast, func, or_
+
+from src.database import models
+
+SEARCH_COLUMNS = (models.Contact.first_name, models.Contact.last_name, models.Contact.email)
+MAX_TERMS = 5
+LIKE_ESCAPE = "/"
+
+
+def tokenize(query: str) -> List[str]:
+    return query.lower().split()[:MAX_TERMS]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def match_filter(terms: List[str]):
+    # Every term has to occur in at least one column. On Postgres the ILIKE
+    # predicates are served by the pg_trgm GIN indexes on these columns.
+    return and_(*[
+        or_(*[column.ilike(f"%{_escape_like(term)}%", escape=LIKE_ESCAPE) for column in SEARCH_COLUMNS])
+        for term in terms
+    ])
+
+
+def rank_expr(terms: List[str], dialect_name: str):
+    parts = []
+    for term in terms:
+        prefix = f"{_escape_like(term)}%"
+        parts.append(case((or_(*[column.ilike(prefix, escape=LIKE_ESCAPE) for column in SEARCH_COLUMNS]), 1.0), else_=0.0))
+        if dialect_name == "postgresql":
+            parts.append(func.coalesce(func.greatest(*[func.similarity(column, term) for column in SEARCH_COLUMNS]), 0.0))
+    return cast(reduce(lambda left, right: left + right, parts), Float)
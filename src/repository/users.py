@@ -1,9 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from typing import Optional
 
 from src.database import models
+from src.database.db import after_commit
 from src.schemas.user import UserCreate
+from src.cache.user_cache import invalidate_user
+from src.cache.tiered import cached, invalidate, dump_model, load_model
 
 
 async def get_user_by_email(db: AsyncSession, email: str):
@@ -12,41 +15,44 @@ async def get_user_by_email(db: AsyncSession, email: str):
     )
     return result.scalar_one_or_none()
 
-async def get_user_by_id(db: AsyncSession, user_id: int):
+async def _select_user_by_id(db: AsyncSession, user_id: int):
     result = await db.execute(
         select(models.User).filter(models.User.id == user_id)
     )
     return result.scalar_one_or_none()
 
+# The password hash never leaves Postgres; callers needing it must use _select_user_by_id.
+@cached("users", key=("user_id",), dump=lambda user: dump_model(user, exclude=("hashed_password",)),
+        load=load_model(models.User), maxsize=1024)
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await _select_user_by_id(db, user_id)
 
-async def create_user(db: AsyncSession, user: UserCreate, hashed_password: str):
-    db_user = models.User(email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
-    return db_user
 
-async def update_user_is_verified(db: AsyncSession, user_id: int, is_verified: bool) -> Optional[models.User]:
-    user = await get_user_by_id(db, user_id)
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: str):
+    stmt = insert(models.User).values(email=user.email, hashed_password=hashed_password).returning(models.User)
+    return (await db.execute(stmt)).scalar_one()
+
+async def _update_user(db: AsyncSession, user_id: int, **values) -> Optional[models.User]:
+    # UPDATE ... RETURNING: the row comes back with the write, no SELECT before or refresh after.
+    stmt = (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(**values)
+        .returning(models.User)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    user = (await db.execute(stmt)).scalar_one_or_none()
     if user:
-        user.is_verified = is_verified
-        await db.commit()
-        await db.refresh(user)
+        after_commit(db, invalidate_user, user.email)
+        after_commit(db, invalidate, "users", user.id)
     return user
 
+async def update_user_is_verified(db: AsyncSession, user_id: int, is_verified: bool) -> Optional[models.User]:
+    return await _update_user(db, user_id, is_verified=is_verified)
+
 
 async def update_user_password(db: AsyncSession, user_id: int, new_hashed_password: str) -> Optional[models.User]:
-    user = await get_user_by_id(db, user_id)
-    if user:
-        user.hashed_password = new_hashed_password
-        await db.commit()
-        await db.refresh(user)
-    return user
+    return await _update_user(db, user_id, hashed_password=new_hashed_password)
 
 async def update_user_avatar(db: AsyncSession, user_id: int, avatar_url: str) -> Optional[models.User]:
-    user = await  get_user_by_id(db, user_id)
-    if user:
-        user.avatar = avatar_url
-        await db.commit()
-        await db.refresh(user)
-    return user
\ No newline at end of file
+    return await _update_user(db, user_id, avatar=avatar_url)
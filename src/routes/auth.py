@@ -1,24 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form
-from jose import JWTError, jwt
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.schemas.user import RequestPasswordReset, ResetPassword, Token, UserLogin, UserCreate, UserResponse
+from src.schemas.user import RequestPasswordReset, ResetPassword, Token, UserLogin, UserCreate, UserResponse, LogoutRequest, RefreshRequest
 from src.repository import users as repository_users
-from src.auth.auth import get_password_hash, verify_password, create_access_token, create_refresh_token, verify_email_token, create_password_reset_token_and_save, reset_password, create_email_verification_token_and_save
+from src.auth.auth import get_password_hash, verify_email_token, create_password_reset_token_and_save, reset_password, create_email_verification_token, token_claims, oauth2_scheme
+from src.auth import tokens
 from src.services.email import send_email
-from src.database.db import get_db
-from src.conf.config import settings
+from src.database.db import after_commit, get_db
+from src.services.passwords import password_hasher
+from src.services.rate_limit import enforce_login, limit_per_ip
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_per_ip("register"))])
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    existing_user = await repository_users.get_user_by_email(user.email, db)
+    existing_user = await repository_users.get_user_by_email(db, user.email)
     if existing_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     new_user = await repository_users.create_user(user=user, hashed_password=hashed_password, db=db)
-    verification_token = await create_email_verification_token_and_save(new_user.id, db)
-    await send_email(new_user.email, new_user.email, verification_token, "verify_email")
+    verification_token = await create_email_verification_token(new_user.id, db)
+    # Queued only once the user row is committed, so a rolled-back signup sends nothing.
+    after_commit(db, send_email, new_user.email, new_user.email, verification_token, "verify_email")
     return new_user
 
 @router.get("/verify_email/{token}")
@@ -29,27 +33,53 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
     return {"message": "Email successfully verified"}
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
-    db_user = await repository_users.get_user_by_email(user.email, db)
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserLogin, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    await enforce_login(request, response, user.email)
+    db_user = await repository_users.get_user_by_email(db, user.email)
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = await password_hasher.verify_and_update(user.password, db_user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if not db_user.is_verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Email not verified. Please check your inbox.")
-    access_token = create_access_token(data={"sub": db_user.email})
-    refresh_token = create_refresh_token(data={"sub": db_user.email})
+    if new_hash:
+        await repository_users.update_user_password(db, db_user.id, new_hash)
+    access_token, refresh_token = await tokens.start_session(token_claims(db_user))
     return Token(
         access_token=access_token,
         refresh_token=refresh_token,
         token_type="bearer"
     )
 
+@router.post("/refresh", response_model=Token, dependencies=[Depends(limit_per_ip("refresh"))])
+async def refresh(body: RefreshRequest):
+    # No password check and no database: rotating a refresh token is one Lua call in Redis.
+    outcome, pair = await tokens.rotate_session(body.refresh_token)
+    if pair is None:
+        detail = "Refresh token reuse detected, please log in again" if outcome == tokens.REUSED else "Invalid or expired refresh token"
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail,
+                            headers={"WWW-Authenticate": "Bearer"})
+    access_token, refresh_token = pair
+    return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(body: Optional[LogoutRequest] = None, token: str = Depends(oauth2_scheme)):
+    if await tokens.verify_token(token, tokens.ACCESS) is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials",
+                            headers={"WWW-Authenticate": "Bearer"})
+    await tokens.revoke_token(token, tokens.ACCESS)
+    await tokens.end_session(token, tokens.ACCESS)
+    if body is not None and body.refresh_token:
+        await tokens.revoke_token(body.refresh_token, tokens.REFRESH)
+    return {"message": "Logged out"}
+
 @router.post("/request_password_reset", status_code=status.HTTP_200_OK)
 async def request_password_reset(body: RequestPasswordReset, db: AsyncSession = Depends(get_db)):
     token = await create_password_reset_token_and_save(body.email, db)
-    user = await repository_users.get_user_by_email(body.email, db)
-    if token and user:
-        await send_email(user.email, user.email, token, "reset_password")
+    if token:
+        after_commit(db, send_email, body.email, body.email, token, "reset_password")
     return {"message": "If a user with that email exists, a password reset link has been sent."}
 
 @router.post("/reset_password", status_code=status.HTTP_200_OK)
@@ -61,19 +91,19 @@ async def reset_password_confirm(body: ResetPassword, db: AsyncSession = Depends
 
 
 @router.post("/reset-password")
-async def reset_password(token:str = Form(...), new_password: str = Form(...), db: AsyncSession = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=400, detail="Invalid token")
-    except JWTError:
+async def reset_password_form(token:str = Form(...), new_password: str = Form(...), db: AsyncSession = Depends(get_db)):
+    # Same checks as get_current_user: a revoked or logged-out token cannot reset a password.
+    claims = await tokens.verify_token(token, tokens.ACCESS)
+    if claims is None:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
+    email = claims.get("sub")
+    if email is None:
+        raise HTTPException(status_code=400, detail="Invalid token")
 
-    user = await repository_users.get_user_by_email(email, db)
+    user = await repository_users.get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=400, detail="User not found")
-    hashed_password = get_password_hash(new_password)
-    user.hashed_password = hashed_password
-    await db.commit()
+    hashed_password = await get_password_hash(new_password)
+    await repository_users.update_user_password(db, user.id, hashed_password)
+    after_commit(db, tokens.revoke_user_tokens, user.id)
     return {"message": "Password has been reset successfully"}
\ No newline at end of file
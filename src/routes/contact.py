@@ -1,32 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from src.schemas.contact import ContactCreate, ContactResponse, ContactUpdate
+from datetime import date
+from src.schemas.contact import ContactCreate, ContactResponse, ContactUpdate, ContactPage, ContactImportReport, ContactBatchUpdate, ContactBatchDelete, ContactBatchReport, ContactBatchResult
 from src.database.db import get_db
 from src.auth.auth import get_current_user
 from src.database.models import User
 from src.repository import contacts as repository_contacts
 from typing import Optional
-from fastapi_limiter.depends import RateLimiter
 from src.cache.redis_client import redis_client
+from src.conf.config import settings
+from src.services.pagination import AFTER, BEFORE, decode_cursor, encode_cursor
+from src.services import contact_import, contact_export
+from src.cache.response_cache import cached_json_response
+from src.services.rate_limit import limit_per_user
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
-@router.get("/", response_model=List[ContactResponse])
-async def get_contacts(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    contacts = await repository_contacts.get_contacts_by_user(current_user.id, db)
-    return contacts
+PageLimit = Query(settings.contacts_page_size, ge=1, le=settings.contacts_page_max_size)
 
-@router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+ContactList = TypeAdapter(List[ContactResponse])
+
+
+async def _contacts_page(db: AsyncSession, user_id: int, cursor: Optional[str], limit: int) -> ContactPage:
+    position = decode_cursor(cursor, user_id)
+    after_id = position.id if position.direction == AFTER else None
+    before_id = position.id if position.direction == BEFORE else None
+    contacts, has_more = await repository_contacts.get_contacts_page(
+        db, user_id, limit, after_id=after_id, before_id=before_id
+    )
+    return _build_page(user_id, position, [(contact, None) for contact in contacts], has_more)
+
+
+async def _search_page(db: AsyncSession, user_id: int, query: str, cursor: Optional[str], limit: int) -> ContactPage:
+    position = decode_cursor(cursor, user_id)
+    boundary = (position.rank, position.id) if position.id is not None else None
+    if boundary is not None and position.rank is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows, has_more = await repository_contacts.search_contacts_page(
+        db, user_id, query, limit,
+        after=boundary if position.direction == AFTER else None,
+        before=boundary if position.direction == BEFORE else None,
+    )
+    return _build_page(user_id, position, rows, has_more)
+
+
+def _build_page(user_id: int, position, rows, has_more: bool) -> ContactPage:
+    page = ContactPage(items=[contact for contact, _ in rows])
+    if rows:
+        first, first_rank = rows[0]
+        last, last_rank = rows[-1]
+        if (position.direction == AFTER and has_more) or position.direction == BEFORE:
+            page.next_cursor = encode_cursor(user_id, last.id, AFTER, last_rank)
+        if (position.direction == BEFORE and has_more) or (position.direction == AFTER and position.id is not None):
+            page.prev_cursor = encode_cursor(user_id, first.id, BEFORE, first_rank)
+    return page
+
+
+def _batch_ids(ids: List[int]) -> List[int]:
+    unique = list(dict.fromkeys(ids))
+    if not unique:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No contact ids given")
+    if len(unique) > settings.contacts_batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.contacts_batch_max_size} contacts per batch",
+        )
+    return unique
+
+
+def _batch_report(ids: List[int], done, done_status: str) -> ContactBatchReport:
+    report = ContactBatchReport()
+    for contact_id in ids:
+        if contact_id in done:
+            report.succeeded += 1
+            report.results.append(ContactBatchResult(id=contact_id, status=done_status))
+        else:
+            report.not_found += 1
+            report.results.append(ContactBatchResult(id=contact_id, status="not_found"))
+    return report
+
+@router.get("/", response_model=ContactPage)
+async def get_contacts(request: Request, cursor: Optional[str] = None, limit: int = PageLimit, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    async def produce() -> bytes:
+        page = await _contacts_page(db, current_user.id, cursor, limit)
+        return page.model_dump_json().encode()
+    return await cached_json_response(request, current_user.id, f"list:{cursor or ''}:{limit}", produce)
+
+@router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_per_user("contacts_create"))])
 async def create_contact(contact: ContactCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     new_contact = await repository_contacts.create_contact(user_id=current_user.id, contact=contact, db=db)
     return new_contact
 
+@router.post("/import", response_model=ContactImportReport, dependencies=[Depends(limit_per_user("contacts_import"))])
+async def import_contacts(request: Request, format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or contact_import.CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+    return await contact_import.import_contacts(db, current_user.id, request.stream(), fmt)
+
+@router.get("/export")
+async def export_contacts(format: str = Query(contact_export.CSV, pattern="^(csv|ndjson|vcard)$"), current_user: User = Depends(get_current_user)):
+    filename = f"contacts.{contact_export.EXTENSIONS[format]}"
+    return StreamingResponse(
+        contact_export.stream_contacts(current_user.id, format),
+        media_type=contact_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.patch("/batch", response_model=ContactBatchReport, dependencies=[Depends(limit_per_user("contacts_batch"))])
+async def update_contacts_batch(batch: ContactBatchUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    ids = _batch_ids(batch.ids)
+    changes = batch.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No changes given")
+    cleared = [name for name, value in changes.items() if value is None and name != "extra_info"]
+    if cleared:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot clear {', '.join(cleared)}")
+    updated = await repository_contacts.update_contacts(db, ids, batch.changes, current_user.id)
+    return _batch_report(ids, updated, "updated")
+
+@router.delete("/batch", response_model=ContactBatchReport, dependencies=[Depends(limit_per_user("contacts_batch"))])
+async def delete_contacts_batch(batch: ContactBatchDelete, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    ids = _batch_ids(batch.ids)
+    deleted = await repository_contacts.delete_contacts(db, ids, current_user.id)
+    return _batch_report(ids, deleted, "deleted")
+
 @router.get("/{contact_id}", response_model=ContactResponse)
-async def get_contact_by_id(contact_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    contact = await repository_contacts.get_contact(db, contact_id, current_user.id)
-    if contact is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contact
+async def get_contact_by_id(request: Request, contact_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    async def produce() -> bytes:
+        contact = await repository_contacts.get_contact(db, contact_id, current_user.id)
+        if contact is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+        return ContactResponse.model_validate(contact).model_dump_json().encode()
+    return await cached_json_response(request, current_user.id, f"contact:{contact_id}", produce)
 
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(contact_id: int, updated_contact: ContactUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
@@ -42,15 +151,17 @@ async def delete_contact(contact_id: int, current_user: User = Depends(get_curre
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-@router.get("/search/", response_model=List[ContactResponse])
-async def search_contacts(query: Optional[str] = None, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+@router.get("/search/", response_model=ContactPage, dependencies=[Depends(limit_per_user("contacts_search"))])
+async def search_contacts(query: Optional[str] = None, cursor: Optional[str] = None, limit: int = PageLimit, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     if query is None or not query.strip():
-        return await repository_contacts.get_contacts(db, current_user.id)
-    contacts = await repository_contacts.search_contacts(db, query, current_user.id)
-    return contacts
+        return await _contacts_page(db, current_user.id, cursor, limit)
+    return await _search_page(db, current_user.id, query, cursor, limit)
 
 @router.get("/birthdays/upcoming", response_model=List[ContactResponse])
-async def get_upcoming_birthdays(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    birthdays = await repository_contacts.get_upcoming_birthdays(db, current_user.id)
-    return birthdays
+async def get_upcoming_birthdays(request: Request, days: int = Query(settings.birthdays_window_days, ge=0, le=366), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    async def produce() -> bytes:
+        birthdays = await repository_contacts.get_upcoming_birthdays(db, current_user.id, days)
+        return ContactList.dump_json(ContactList.validate_python(birthdays, from_attributes=True))
+    # The window depends on today's date, so the date is part of the key.
+    return await cached_json_response(request, current_user.id, f"birthdays:{date.today().isoformat()}:{days}", produce)
 
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, Depends
-from src.services.cloudinary_service import upload_avatar
-from src.database.db import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.auth import get_current_user
+from src.database.db import get_db
+from src.database.models import User
+from src.repository import users as repository_users
+from src.services.avatars import process_avatar
 
 router = APIRouter(
     prefix="/users",
@@ -17,6 +20,7 @@ async def get_user(user_id: int):
     return {"message": f"Details of user {user_id}"}
 
 @router.post("/avatar")
-async def update_avatar(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
-    url = upload_avatar(file.file)
+async def update_avatar(file: UploadFile = File(...), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    url = await process_avatar(current_user.id, file)
+    await repository_users.update_user_avatar(db, current_user.id, url)
     return {"avatar_url": url}
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 
 class ContactBase(BaseModel):
@@ -25,4 +25,54 @@ class ContactResponse(ContactBase):
     user_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ContactPatch(BaseModel):
+    # Applied to every contact in a batch, so the unique email is not patchable here.
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    birthday: Optional[date] = None
+    extra_info: Optional[str] = None
+
+
+class ContactBatchUpdate(BaseModel):
+    ids: List[int]
+    changes: ContactPatch
+
+
+class ContactBatchDelete(BaseModel):
+    ids: List[int]
+
+
+class ContactBatchResult(BaseModel):
+    id: int
+    status: str
+
+
+class ContactBatchReport(BaseModel):
+    succeeded: int = 0
+    not_found: int = 0
+    results: List[ContactBatchResult] = []
+
+
+class ContactPage(BaseModel):
+    items: List[ContactResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+
+class ContactImportError(BaseModel):
+    line: int
+    errors: List[str]
+
+
+class ContactImportReport(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ContactImportError] = []
+    errors_truncated: bool = False
+    rows_truncated: bool = False
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from datetime import date
+from datetime import datetime
 from typing import Optional
 
 
@@ -14,7 +14,7 @@ class UserLogin(UserBase):
 
 class UserResponse(UserBase):
     id: int
-    created_at: Optional[date]
+    created_at: Optional[datetime]
 
     class Config:
         from_attributes = True
@@ -24,6 +24,12 @@ class Token(BaseModel):
     refresh_token: str
     token_type: str = "bearer"
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -0,0 +1,40 @@
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Protocol
+
+from src.conf.config import settings
+from src.services.cloudinary_service import upload_avatar
+
+
+class AvatarStorage(Protocol):
+    async def save(self, user_id: int, data: bytes, content_type: str) -> str:
+        ...
+
+
+class CloudinaryStorage:
+    async def save(self, user_id: int, data: bytes, content_type: str) -> str:
+        # The Cloudinary SDK is blocking; keep it off the event loop.
+        return await asyncio.to_thread(upload_avatar, data, public_id=f"avatars/user_{user_id}")
+
+
+class LocalStorage:
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root) / "avatars"
+        self.base_url = base_url.rstrip("/")
+
+    def _write(self, name: str, data: bytes) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / name).write_bytes(data)
+
+    async def save(self, user_id: int, data: bytes, content_type: str) -> str:
+        # The content hash in the name busts browser caches when the avatar changes.
+        name = f"user_{user_id}_{hashlib.sha256(data).hexdigest()[:12]}.jpg"
+        await asyncio.to_thread(self._write, name, data)
+        return f"{self.base_url}/avatars/{name}"
+
+
+def get_storage() -> AvatarStorage:
+    if settings.avatar_storage == "local":
+        return LocalStorage(settings.media_root, settings.media_url)
+    return CloudinaryStorage()
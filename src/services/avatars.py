@@ -0,0 +1,57 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import settings
+from src.services.avatar_storage import get_storage
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+READ_CHUNK_SIZE = 64 * 1024
+# Room for the multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+# Refuse decompression bombs before decoding: 25 megapixels is far beyond any sane avatar.
+MAX_PIXELS = 25_000_000
+
+_executor = ThreadPoolExecutor(max_workers=settings.avatar_workers, thread_name_prefix="avatar")
+
+
+async def read_limited(file: UploadFile, max_bytes: int) -> bytes:
+    buffer = bytearray()
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Avatar must be at most {max_bytes // 1024} KiB",
+            )
+    return bytes(buffer)
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    try:
+        with Image.open(BytesIO(data)) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise ValueError(f"Unsupported image format {image.format}")
+            if image.width * image.height > MAX_PIXELS:
+                raise ValueError("Image dimensions are too large")
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValueError("Not a valid image")
+    output = BytesIO()
+    thumbnail.save(output, format="JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
+
+async def process_avatar(user_id: int, file: UploadFile) -> str:
+    data = await read_limited(file, settings.avatar_max_bytes)
+    try:
+        thumbnail = await asyncio.get_running_loop().run_in_executor(
+            _executor, make_thumbnail, data, settings.avatar_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return await get_storage().save(user_id, thumbnail, "image/jpeg")
@@ -10,6 +10,6 @@ cloudinary.config(
     secure=True
 )
 
-def upload_avatar(file):
-    result = cloudinary.uploader.upload(file)
+def upload_avatar(file, public_id=None):
+    result = cloudinary.uploader.upload(file, public_id=public_id, overwrite=True, resource_type="image")
     return result["secure_url"]
\ No newline at end of file
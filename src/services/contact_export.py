@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List
+
+from sqlalchemy import select
+
+from src.database import models
+from src.database.db import AsyncSessionLocal
+
+CSV = "csv"
+NDJSON = "ndjson"
+VCARD = "vcard"
+
+MEDIA_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    NDJSON: "application/x-ndjson",
+    VCARD: "text/vcard; charset=utf-8",
+}
+EXTENSIONS = {CSV: "csv", NDJSON: "ndjson", VCARD: "vcf"}
+
+FIELDS = ["id", "first_name", "last_name", "email", "phone_number", "birthday", "extra_info"]
+
+EXPORT_BATCH_SIZE = 500
+
+
+def _encode_csv(rows: List, with_header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if with_header:
+        writer.writerow(FIELDS)
+    for row in rows:
+        writer.writerow([row.id, row.first_name, row.last_name, row.email, row.phone,
+                         row.birthday.isoformat() if row.birthday else "", row.extra_info or ""])
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows: List) -> str:
+    return "".join(
+        json.dumps({
+            "id": row.id,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "email": row.email,
+            "phone_number": row.phone,
+            "birthday": row.birthday.isoformat() if row.birthday else None,
+            "extra_info": row.extra_info,
+            "user_id": row.owner_id,
+        }) + "\n"
+        for row in rows
+    )
+
+
+def _vcard_escape(value) -> str:
+    return (str(value or "").replace("\\", "\\\\").replace("\n", "\\n")
+            .replace(",", "\\,").replace(";", "\\;"))
+
+
+def _encode_vcard(rows: List) -> str:
+    cards = []
+    for row in rows:
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"N:{_vcard_escape(row.last_name)};{_vcard_escape(row.first_name)};;;",
+            f"FN:{_vcard_escape(' '.join(filter(None, [row.first_name, row.last_name])))}",
+        ]
+        if row.email:
+            lines.append(f"EMAIL;TYPE=INTERNET:{_vcard_escape(row.email)}")
+        if row.phone:
+            lines.append(f"TEL:{_vcard_escape(row.phone)}")
+        if row.birthday:
+            lines.append(f"BDAY:{row.birthday.isoformat()}")
+        if row.extra_info:
+            lines.append(f"NOTE:{_vcard_escape(row.extra_info)}")
+        lines.append("END:VCARD")
+        cards.append("\r\n".join(lines) + "\r\n")
+    return "".join(cards)
+
+
+async def stream_contacts(user_id: int, fmt: str) -> AsyncIterator[bytes]:
+    # The generator outlives the request's get_db session, so it owns its own. Plain column
+    # rows (not ORM objects) keep the identity map empty and memory flat.
+    stmt = (
+        select(models.Contact.id, models.Contact.first_name, models.Contact.last_name,
+               models.Contact.email, models.Contact.phone, models.Contact.birthday,
+               models.Contact.extra_info, models.Contact.owner_id)
+        .filter(models.Contact.owner_id == user_id)
+        .order_by(models.Contact.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    first = True
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            if fmt == CSV:
+                chunk = _encode_csv(rows, with_header=first)
+            elif fmt == NDJSON:
+                chunk = _encode_ndjson(rows)
+            else:
+                chunk = _encode_vcard(rows)
+            first = False
+            yield chunk.encode("utf-8")
+    if first and fmt == CSV:
+        yield _encode_csv([], with_header=True).encode("utf-8")
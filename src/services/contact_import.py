@@ -0,0 +1,166 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.db import commit
+from src.repository import contacts as repository_contacts
+from src.schemas.contact import ContactCreate, ContactImportError, ContactImportReport
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+CONTENT_TYPES = {
+    "text/csv": CSV,
+    "application/csv": CSV,
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+    "application/jsonlines": NDJSON,
+}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    # A line over the length limit is dropped as it arrives and yielded as None, so memory
+    # stays bounded even without newlines; line numbers stay in step.
+    max_length = settings.contacts_import_max_record_length
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending, overlong = "", False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield None if overlong or len(line) > max_length else line.rstrip("\r")
+            overlong = False
+        if len(pending) > max_length:
+            pending, overlong = "", True
+    pending += decoder.decode(b"", final=True)
+    if overlong or len(pending) > max_length:
+        yield None
+    elif pending:
+        yield pending.rstrip("\r")
+
+
+def too_long(what: str = "Line") -> str:
+    return f"{what} is longer than {settings.contacts_import_max_record_length} characters"
+
+
+async def iter_csv_rows(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Tuple[int, object]]:
+    header = None
+    record, record_start = "", 0
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is None and not record and header is not None:
+            yield line_no, too_long()
+            continue
+        if not record:
+            record_start = line_no
+        if line is None or len(record) + len(line) > settings.contacts_import_max_record_length:
+            # An oversized header or quoted field leaves nothing after it parseable.
+            yield record_start, f"{too_long('Record')}; import stopped"
+            return
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            # A quoted field continues on the next line.
+            continue
+        values, record = next(csv.reader([record])), ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if len(values) != len(header):
+            yield record_start, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield record_start, {name: (value if value != "" else None) for name, value in zip(header, values)}
+    if record:
+        yield record_start, "Unterminated quoted field"
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Tuple[int, object]]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is None:
+            yield line_no, too_long()
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, "Expected a JSON object"
+            continue
+        yield line_no, row
+
+
+class _Importer:
+    def __init__(self, db: AsyncSession, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.report = ContactImportReport()
+        self.batch: List[Tuple[int, ContactCreate]] = []
+
+    def fail(self, line: int, errors: List[str]) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < settings.contacts_import_max_errors:
+            self.report.errors.append(ContactImportError(line=line, errors=errors))
+        else:
+            self.report.errors_truncated = True
+
+    async def add(self, line: int, row) -> None:
+        self.report.total += 1
+        if isinstance(row, str):
+            self.fail(line, [row])
+            return
+        try:
+            contact = ContactCreate(**row)
+        except ValidationError as e:
+            self.fail(line, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()])
+            return
+        self.batch.append((line, contact))
+        if len(self.batch) >= settings.contacts_import_batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+        first_seen: Dict[str, int] = {}
+        unique = []
+        for line, contact in self.batch:
+            if contact.email in first_seen:
+                self.fail(line, [f"email: duplicates line {first_seen[contact.email]}"])
+                continue
+            first_seen[contact.email] = line
+            unique.append((line, contact))
+        inserted = await repository_contacts.bulk_insert_contacts(
+            self.db, [contact for _, contact in unique], self.user_id
+        )
+        for line, contact in unique:
+            if contact.email in inserted:
+                self.report.inserted += 1
+            else:
+                self.fail(line, ["email: a contact with this email already exists"])
+        self.batch = []
+        # Each batch is its own unit of work so a large import never holds one long transaction.
+        await commit(self.db)
+
+
+async def import_contacts(db: AsyncSession, user_id: int, chunks: AsyncIterator[bytes], fmt: str) -> ContactImportReport:
+    parse = iter_csv_rows if fmt == CSV else iter_ndjson_rows
+    importer = _Importer(db, user_id)
+    async for line, row in parse(iter_lines(chunks)):
+        if importer.report.total >= settings.contacts_import_max_rows:
+            importer.report.rows_truncated = True
+            break
+        await importer.add(line, row)
+    await importer.flush()
+    return importer.report
@@ -1,10 +1,14 @@
+from email.message import EmailMessage
 from pathlib import Path
 
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
-from jinja2 import Environment, FileSystemLoader
+from redis.exceptions import RedisError
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from src.conf.config import settings
+from src.services import mail_queue
+
+TEMPLATE_FOLDER = Path(__file__).parent / 'templates'
 
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.mail_username,
@@ -17,38 +21,59 @@ conf = ConnectionConfig(
     MAIL_SSL_TLS=settings.mail_ssl,
     USE_CREDENTIALS=True,
     VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates'
+    TEMPLATE_FOLDER=TEMPLATE_FOLDER
 )
 
+# Created once so compiled templates stay in Jinja's cache between messages.
+template_env = Environment(loader=FileSystemLoader(TEMPLATE_FOLDER), autoescape=select_autoescape(["html"]))
+
+EMAIL_TYPES = {
+    "verify_email": ("Verify your email - Contacts App", "email_verify.html", "/auth/verify_email/{token}"),
+    "reset_password": ("Reset your password - Contacts App", "email_reset_password.html", "/auth/reset_password?token={token}"),
+}
+
+
+def build_message(email: str, user_name: str, token: str, email_type: str) -> EmailMessage:
+    if email_type not in EMAIL_TYPES:
+        raise ValueError("Invalid email type specified.")
+    subject, template_name, path = EMAIL_TYPES[email_type]
+    link = f"{settings.base_url}{path.format(token=token)}"
+    html = template_env.get_template(template_name).render(host=settings.base_url, user_name=user_name, link=link)
+
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = f"Contacts App <{settings.mail_from}>"
+    message["To"] = email
+    message.set_content(f"Open this link: {link}")
+    message.add_alternative(html, subtype="html")
+    return message
+
+
 async def send_email(email: EmailStr, user_name: str, token: str, email_type: str):
+    # Delivery happens in src.services.mail_worker; the request only pays for one Redis LPUSH.
+    if email_type not in EMAIL_TYPES:
+        raise ValueError("Invalid email type specified.")
     try:
-        if email_type == "verify_email":
-            subject = "Verify your email - Contacts App"
-            template_name = "email_verify.html"
-            link = f"{settings.base_url}/auth/verify_email/{token}"
-        elif email_type == "reset_password":
-            subject = "Reset your password - Contacts App"
-            template_name = "email_reset_password.html"
-            link = f"{settings.base_url}/auth/reset_password?token={token}"
-        else:
-            raise ValueError("Invalid email type specified.")
+        job_id = await mail_queue.enqueue(email, user_name, token, email_type)
+    except RedisError as e:
+        print(f"Could not queue email '{email_type}' to {email}, sending directly: {e}")
+        await send_directly(build_message(email, user_name, token, email_type))
+        return
+    print(f"Email '{email_type}' to {email} queued as {job_id}")
 
-        message = MessageSchema(
-            subject=subject,
-            recipients=[email],
-            template_body={"host": settings.base_url, "user_name": user_name, "link": link},
-            subtype=MessageType.html
-        )
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name=template_name)
-        print(f"Email '{email_type}' sent successfully to {email}")
+async def send_directly(message: EmailMessage) -> None:
+    # Imported here: mail_worker imports build_message from this module.
+    import aiosmtplib
+    from src.services.mail_worker import SMTPConnection
 
-    except ConnectionErrors as e:
-        print(f"Failed to send email to {email}: Connection error - {e}")
-
-    except Exception as e:
-        print(f"Failed to send email to {email}: An unexpected error occurred - {e}")
+    connection = SMTPConnection()
+    try:
+        await connection.send(message)
+    except (aiosmtplib.SMTPException, OSError) as e:
+        print(f"Sending email to {message['To']} failed: {e}")
+    finally:
+        await connection.close()
 
 async def send_reset_password_email(email: str, token: str):
     env = Environment(loader=FileSystemLoader("templates"))
@@ -0,0 +1,77 @@
+import json
+import time
+import uuid
+from typing import Optional
+
+from src.cache.redis_client import redis_client
+
+QUEUE_KEY = "mail:queue"
+PROCESSING_KEY = "mail:processing"
+RETRY_KEY = "mail:retry"
+DEAD_KEY = "mail:dead"
+
+
+async def enqueue(email: str, user_name: str, token: str, email_type: str) -> str:
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "email": email,
+        "user_name": user_name,
+        "token": token,
+        "email_type": email_type,
+        "attempts": 0,
+        "enqueued_at": time.time(),
+    }
+    await redis_client.lpush(QUEUE_KEY, json.dumps(job))
+    return job_id
+
+
+async def claim(timeout: float) -> Optional[str]:
+    # The job stays in PROCESSING_KEY until acked, so a crashed worker does not lose it.
+    return await redis_client.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+
+
+async def ack(raw: str) -> None:
+    await redis_client.lrem(PROCESSING_KEY, 1, raw)
+
+
+async def retry_later(raw: str, job: dict, delay: float) -> None:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.zadd(RETRY_KEY, {json.dumps(job): time.time() + delay})
+        pipe.lrem(PROCESSING_KEY, 1, raw)
+        await pipe.execute()
+
+
+async def bury(raw: str, job: dict) -> None:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.lpush(DEAD_KEY, json.dumps(job))
+        pipe.lrem(PROCESSING_KEY, 1, raw)
+        await pipe.execute()
+
+
+async def promote_due(limit: int = 100) -> int:
+    due = await redis_client.zrangebyscore(RETRY_KEY, "-inf", time.time(), start=0, num=limit)
+    promoted = 0
+    for raw in due:
+        # Only the worker whose ZREM succeeds re-queues the job.
+        if await redis_client.zrem(RETRY_KEY, raw):
+            await redis_client.lpush(QUEUE_KEY, raw)
+            promoted += 1
+    return promoted
+
+
+async def recover_in_flight() -> int:
+    recovered = 0
+    while await redis_client.lmove(PROCESSING_KEY, QUEUE_KEY, "RIGHT", "RIGHT"):
+        recovered += 1
+    return recovered
+
+
+async def queue_depth() -> dict:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.llen(QUEUE_KEY)
+        pipe.llen(PROCESSING_KEY)
+        pipe.zcard(RETRY_KEY)
+        pipe.llen(DEAD_KEY)
+        queued, processing, retrying, dead = await pipe.execute()
+    return {"queued": queued, "processing": processing, "retrying": retrying, "dead": dead}
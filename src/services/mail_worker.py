@@ -0,0 +1,116 @@
+import asyncio
+import json
+import random
+import signal
+from typing import Optional
+
+import aiosmtplib
+
+from src.conf.config import settings
+from src.services import mail_queue
+from src.services.email import build_message
+
+
+class SMTPConnection:
+    # One long-lived SMTP session per consumer; reopened lazily when the server drops it.
+    def __init__(self):
+        self.client: Optional[aiosmtplib.SMTP] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=settings.mail_server,
+            port=settings.mail_port,
+            use_tls=settings.mail_ssl,
+            start_tls=settings.mail_starttls,
+            username=settings.mail_username or None,
+            password=settings.mail_password or None,
+            timeout=settings.mail_smtp_timeout,
+        )
+        await client.connect()
+        return client
+
+    async def send(self, message) -> None:
+        for attempt in range(2):
+            if self.client is None or not self.client.is_connected:
+                self.client = await self._connect()
+            try:
+                await self.client.send_message(message)
+                return
+            except aiosmtplib.SMTPServerDisconnected:
+                self.client = None
+                if attempt:
+                    raise
+
+    async def close(self) -> None:
+        if self.client is not None and self.client.is_connected:
+            try:
+                await self.client.quit()
+            except aiosmtplib.SMTPException:
+                pass
+        self.client = None
+
+
+def retry_delay(attempts: int) -> float:
+    delay = min(settings.mail_retry_base_seconds * 2 ** (attempts - 1), settings.mail_retry_max_seconds)
+    return delay * random.uniform(1, 1.25)
+
+
+async def consume(stop: asyncio.Event) -> None:
+    connection = SMTPConnection()
+    try:
+        while not stop.is_set():
+            raw = await mail_queue.claim(timeout=1)
+            if raw is None:
+                continue
+            job = json.loads(raw)
+            try:
+                message = build_message(job["email"], job["user_name"], job["token"], job["email_type"])
+            except ValueError as e:
+                job["last_error"] = str(e)
+                await mail_queue.bury(raw, job)
+                continue
+            try:
+                await connection.send(message)
+            except (aiosmtplib.SMTPException, OSError) as e:
+                job["attempts"] += 1
+                job["last_error"] = str(e)
+                if job["attempts"] >= settings.mail_max_attempts:
+                    print(f"Giving up on email {job['id']} to {job['email']}: {e}")
+                    await mail_queue.bury(raw, job)
+                else:
+                    await mail_queue.retry_later(raw, job, retry_delay(job["attempts"]))
+                continue
+            await mail_queue.ack(raw)
+            print(f"Email '{job['email_type']}' sent successfully to {job['email']}")
+    finally:
+        await connection.close()
+
+
+async def promote_retries(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        await mail_queue.promote_due()
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Jobs left in PROCESSING_KEY by a crashed worker are re-queued, so run one worker
+    # process and scale with MAIL_WORKER_CONCURRENCY instead.
+    recovered = await mail_queue.recover_in_flight()
+    print(f"Mail worker started with {settings.mail_worker_concurrency} SMTP connections, recovered {recovered} jobs.")
+    await asyncio.gather(
+        promote_retries(stop),
+        *(consume(stop) for _ in range(settings.mail_worker_concurrency)),
+    )
+    print("Mail worker stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,38 @@
+import base64
+import binascii
+import json
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, status
+
+AFTER = "after"
+BEFORE = "before"
+
+
+class Cursor(NamedTuple):
+    direction: str
+    id: Optional[int] = None
+    rank: Optional[float] = None
+
+
+def encode_cursor(owner_id: int, last_id: int, direction: str, rank: Optional[float] = None) -> str:
+    payload = {"o": owner_id, "k": last_id, "d": direction}
+    if rank is not None:
+        payload["r"] = rank
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], owner_id: int) -> Cursor:
+    if not cursor:
+        return Cursor(AFTER)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, key, cursor_owner = payload["d"], int(payload["k"]), int(payload["o"])
+        rank = float(payload["r"]) if "r" in payload else None
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if direction not in (AFTER, BEFORE) or cursor_owner != owner_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return Cursor(direction, key, rank)
@@ -0,0 +1,83 @@
+import math
+from typing import Dict, Sequence, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from src.auth.auth import get_current_user
+from src.cache.rate_limit import RateLimitPolicy, RateLimitResult, rate_limiter
+from src.conf.config import settings
+from src.database.models import User
+
+POLICY_NAMES = (
+    "login",
+    "login_ip",
+    "register",
+    "refresh",
+    "contacts_create",
+    "contacts_import",
+    "contacts_search",
+    "contacts_batch",
+)
+
+POLICIES: Dict[str, RateLimitPolicy] = {
+    name: RateLimitPolicy.parse(name, getattr(settings, f"rate_limit_{name}")) for name in POLICY_NAMES
+}
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    reset = str(math.ceil(result.reset))
+    return {
+        "RateLimit-Limit": str(result.policy.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": reset,
+        "RateLimit-Policy": f"{result.policy.limit};w={int(result.policy.window)}",
+    }
+
+
+async def enforce(response: Response, checks: Sequence[Tuple[RateLimitPolicy, str]]) -> None:
+    # Headers describe the policy closest to its limit. Routes returning a Response object
+    # directly do not get them, since FastAPI only merges headers into responses it builds.
+    if not settings.rate_limit_enabled:
+        return
+    result = await rate_limiter.hit(checks)
+    if result is None:
+        return
+    headers = rate_limit_headers(result)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={**headers, "Retry-After": headers["RateLimit-Reset"]},
+        )
+    response.headers.update(headers)
+
+
+def limit_per_user(policy_name: str):
+    policy = POLICIES[policy_name]
+
+    async def dependency(response: Response, current_user: User = Depends(get_current_user)):
+        await enforce(response, [(policy, f"user:{current_user.id}")])
+
+    return dependency
+
+
+def limit_per_ip(policy_name: str):
+    policy = POLICIES[policy_name]
+
+    async def dependency(request: Request, response: Response):
+        await enforce(response, [(policy, f"ip:{client_ip(request)}")])
+
+    return dependency
+
+
+async def enforce_login(request: Request, response: Response, email: str) -> None:
+    # Guessing one account's password is capped per account, spraying many accounts per IP.
+    # Checked before bcrypt so rejected attempts cost no hashing.
+    await enforce(response, [
+        (POLICIES["login"], f"email:{email.lower()}"),
+        (POLICIES["login_ip"], f"ip:{client_ip(request)}"),
+    ])
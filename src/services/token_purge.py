@@ -0,0 +1,39 @@
+import argparse
+import asyncio
+from datetime import datetime
+
+from src.conf.config import settings
+from src.database.db import AsyncSessionLocal, engine
+from src.repository import auth as repository_auth
+
+
+async def purge_expired_tokens(batch_size: int) -> int:
+    # Deletes in short batches, each in its own transaction, so the purge never holds long
+    # locks on verification_tokens while the app keeps inserting into it.
+    purged = 0
+    before = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        while True:
+            deleted = await repository_auth.purge_expired_verification_tokens(db, before, batch_size)
+            await db.commit()
+            purged += deleted
+            if deleted < batch_size:
+                return purged
+
+
+async def run(batch_size: int, interval: float) -> None:
+    while True:
+        purged = await purge_expired_tokens(batch_size)
+        print(f"Purged {purged} expired verification tokens.")
+        if not interval:
+            break
+        await asyncio.sleep(interval)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete expired rows from verification_tokens.")
+    parser.add_argument("--batch-size", type=int, default=settings.verification_token_purge_batch_size)
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds instead of running once")
+    args = parser.parse_args()
+    asyncio.run(run(args.batch_size, args.interval))
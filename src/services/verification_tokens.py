@@ -0,0 +1,90 @@
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache.redis_client import redis_client
+from src.conf.config import settings
+from src.database.db import after_rollback
+from src.database.models import VerificationToken
+from src.repository import auth as repository_auth
+
+
+class VerificationTokenStore(Protocol):
+    async def save(self, db: AsyncSession, user_id: int, token: str, token_type: str) -> None:
+        ...
+
+    async def consume(self, db: AsyncSession, token: str, token_type: str) -> Optional[int]:
+        ...
+
+
+class SqlTokenStore:
+    async def save(self, db: AsyncSession, user_id: int, token: str, token_type: str) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.verification_token_ttl)
+        token_db = VerificationToken(user_id=user_id, token=token, token_type=token_type, expires_at=expires_at)
+        await repository_auth.create_verification_token(token_db, db)
+
+    async def consume(self, db: AsyncSession, token: str, token_type: str) -> Optional[int]:
+        return await repository_auth.consume_verification_token(token, token_type, db)
+
+
+# Returns the user id and remaining TTL in milliseconds and deletes the key, in one step, so
+# concurrent redemptions of one token cannot both see it.
+CLAIM_SCRIPT = """
+local user_id = redis.call('GET', KEYS[1])
+if not user_id then
+    return false
+end
+local ttl = redis.call('PTTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return {user_id, ttl}
+"""
+
+
+class RedisTokenStore:
+    # Expiry is Redis' TTL, so nothing accumulates. A token is claimed atomically; if the
+    # request then rolls back (e.g. the password pool is saturated) it is put back with what
+    # was left of its TTL, so the link stays usable.
+    def __init__(self, redis, fallback: Optional[VerificationTokenStore] = None):
+        self.redis = redis
+        self.fallback = fallback
+        self._claim = redis.register_script(CLAIM_SCRIPT)
+
+    @staticmethod
+    def _key(token: str, token_type: str) -> str:
+        return f"vtoken:{token_type}:{token}"
+
+    async def save(self, db: AsyncSession, user_id: int, token: str, token_type: str) -> None:
+        await self.redis.set(self._key(token, token_type), user_id, ex=settings.verification_token_ttl)
+
+    async def consume(self, db: AsyncSession, token: str, token_type: str) -> Optional[int]:
+        key = self._key(token, token_type)
+        claimed = await self._claim(keys=[key])
+        if claimed:
+            user_id, ttl_ms = claimed
+            expires_at = time.monotonic() + int(ttl_ms) / 1000 if int(ttl_ms) > 0 else None
+            after_rollback(db, self._restore, key, user_id, expires_at)
+            return int(user_id)
+        # Links mailed before the switch to Redis still point at rows in verification_tokens.
+        if self.fallback is not None:
+            return await self.fallback.consume(db, token, token_type)
+        return None
+
+    async def _restore(self, key: str, user_id: str, expires_at: Optional[float]) -> None:
+        # NX: never overwrite a token saved again meanwhile.
+        if expires_at is None:
+            await self.redis.set(key, user_id, nx=True)
+            return
+        remaining_ms = int((expires_at - time.monotonic()) * 1000)
+        if remaining_ms > 0:
+            await self.redis.set(key, user_id, px=remaining_ms, nx=True)
+
+
+def get_token_store() -> VerificationTokenStore:
+    if settings.verification_token_store == "sql":
+        return SqlTokenStore()
+    return RedisTokenStore(redis_client, fallback=SqlTokenStore())
+
+
+token_store = get_token_store()
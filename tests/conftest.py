@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings, the engine and the Redis client are created when src/ is first imported, so the
+# environment and the in-memory Redis have to be in place before any test module imports it.
+TEST_SETTINGS = {
+    "DATABASE_URL": f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='contacts-tests-')}/test.db",
+    "SECRET_KEY": "test-secret",
+    "REFRESH_SECRET_KEY": "test-refresh-secret",
+    "BASE_URL": "http://localhost:8000",
+    "CLOUDINARY_NAME": "test",
+    "CLOUDINARY_API_KEY": "test",
+    "CLOUDINARY_API_SECRET": "test",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "test@example.com",
+    "MAIL_PORT": "1025",
+    "MAIL_SERVER": "localhost",
+    "MAIL_STARTTLS": "false",
+    "MAIL_SSL": "false",
+    "REDIS_HOST": "localhost",
+    "RATE_LIMIT_ENABLED": "false",
+}
+os.environ.update(TEST_SETTINGS)
+
+import fakeredis  # noqa: E402
+import redis.asyncio  # noqa: E402
+
+fake_redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+redis.asyncio.from_url = lambda *args, **kwargs: fake_redis
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def clean_state():
+    from src.auth import tokens
+
+    await fake_redis.flushall()
+    tokens.claims_cache.clear()
+    yield
+
+
+@pytest.fixture
+async def client():
+    import httpx
+
+    from src.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def db():
+    # A fresh schema per test; the app's startup hook (which creates it) does not run here.
+    from src.database import models  # noqa: F401  registers the tables on Base
+    from src.database.db import AsyncSessionLocal, Base, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+from src.database import models
+from src.repository import contacts as repository_contacts
+
+pytestmark = pytest.mark.anyio
+
+
+def frozen_today(day: date):
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return day
+
+    return FrozenDate
+
+
+async def add_contacts(db, birthdays):
+    user = models.User(email="owner@example.com", hashed_password="x", is_verified=True)
+    db.add(user)
+    await db.flush()
+    for name, birthday in birthdays.items():
+        db.add(models.Contact(first_name=name, email=f"{name}@example.com", birthday=birthday, owner_id=user.id))
+    await db.commit()
+    return user.id
+
+
+@pytest.mark.parametrize("today", [date(2025, 2, 27), date(2025, 3, 1)])
+async def test_feb_29_sorts_as_mar_1_in_a_non_leap_year(db, monkeypatch, today):
+    user_id = await add_contacts(db, {
+        "leapling": date(2000, 2, 29),
+        "march_3": date(1990, 3, 3),
+        "march_2": date(1985, 3, 2),
+    })
+    monkeypatch.setattr(repository_contacts, "date", frozen_today(today))
+
+    upcoming = await repository_contacts.get_upcoming_birthdays(db, user_id, days=7)
+    assert [contact.first_name for contact in upcoming] == ["leapling", "march_2", "march_3"]
+
+
+async def test_feb_29_keeps_its_day_in_a_leap_year(db, monkeypatch):
+    user_id = await add_contacts(db, {"march_1": date(1990, 3, 1), "leapling": date(2000, 2, 29)})
+    monkeypatch.setattr(repository_contacts, "date", frozen_today(date(2028, 2, 27)))
+
+    upcoming = await repository_contacts.get_upcoming_birthdays(db, user_id, days=7)
+    assert [contact.first_name for contact in upcoming] == ["leapling", "march_1"]
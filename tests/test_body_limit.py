@@ -0,0 +1,36 @@
+import pytest
+
+from src.conf.config import settings
+from src.services.avatars import MULTIPART_OVERHEAD
+
+pytestmark = pytest.mark.anyio
+
+LIMIT = settings.avatar_max_bytes + MULTIPART_OVERHEAD
+
+
+async def test_declared_oversized_upload_is_refused_unread(client):
+    response = await client.post("/users/avatar", content=b"x" * (LIMIT + 1),
+                                 headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+
+
+async def test_streamed_upload_is_cut_off_at_the_limit(client):
+    chunk = b"x" * (256 * 1024)
+    sent = 0
+
+    async def body():
+        nonlocal sent
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n\r\n'
+        for _ in range(4 * LIMIT // len(chunk)):
+            sent += len(chunk)
+            yield chunk
+
+    response = await client.post("/users/avatar", content=body(),
+                                 headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert sent < 2 * LIMIT
+
+
+async def test_other_paths_are_not_limited(client):
+    response = await client.post("/auth/refresh", json={"refresh_token": "x" * (LIMIT + 1)})
+    assert response.status_code == 401
@@ -0,0 +1,55 @@
+import pytest
+
+from src.conf.config import settings
+from src.services import contact_import
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def small_records(monkeypatch):
+    monkeypatch.setattr(settings, "contacts_import_max_record_length", 100)
+
+
+async def chunked(data: bytes, size: int = 16):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def parse(data: bytes, fmt: str):
+    parse_rows = contact_import.iter_csv_rows if fmt == contact_import.CSV else contact_import.iter_ndjson_rows
+    return [row async for row in parse_rows(contact_import.iter_lines(chunked(data)))]
+
+
+async def test_long_line_without_newline_is_not_buffered():
+    lines = [line async for line in contact_import.iter_lines(chunked(b"a" * 10_000))]
+    assert lines == [None]
+
+
+async def test_long_ndjson_line_is_a_row_error():
+    data = b'{"first_name": "A"}\n{"x": "' + b"a" * 500 + b'"}\n{"first_name": "B"}\n'
+    rows = await parse(data, contact_import.NDJSON)
+    assert rows == [
+        (1, {"first_name": "A"}),
+        (2, "Line is longer than 100 characters"),
+        (3, {"first_name": "B"}),
+    ]
+
+
+async def test_long_csv_line_is_a_row_error():
+    data = b"first_name,last_name\nAnn,Lee\n" + b"x" * 500 + b"\nBob,Ray\n"
+    rows = await parse(data, contact_import.CSV)
+    assert rows == [
+        (2, {"first_name": "Ann", "last_name": "Lee"}),
+        (3, "Line is longer than 100 characters"),
+        (4, {"first_name": "Bob", "last_name": "Ray"}),
+    ]
+
+
+async def test_unterminated_quote_stops_the_import():
+    data = b'first_name,last_name\nAnn,Lee\n"Bob,Ray\n' + b"Cy,Day\n" * 100
+    rows = await parse(data, contact_import.CSV)
+    assert rows == [
+        (2, {"first_name": "Ann", "last_name": "Lee"}),
+        (3, "Record is longer than 100 characters; import stopped"),
+    ]
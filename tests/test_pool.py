@@ -0,0 +1,39 @@
+import tempfile
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.pool import InstrumentedQueuePool, get_pool_stats, pool_stats
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine():
+    url = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='contacts-pool-')}/pool.db"
+    engine = create_async_engine(url, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05)
+    yield engine
+    await engine.dispose()
+
+
+async def test_timeouts_are_not_counted_as_checkouts(engine):
+    before = dict(pool_stats)
+    async with engine.connect() as first, engine.connect() as overflow:
+        await first.execute(text("select 1"))
+        await overflow.execute(text("select 1"))
+        with pytest.raises(exc.TimeoutError):
+            await engine.connect()
+
+    stats = get_pool_stats(engine)
+    assert stats["checkouts"] - before["checkouts"] == 2
+    assert stats["timeouts"] - before["timeouts"] == 1
+    assert stats["overflow_events"] - before["overflow_events"] == 1
+
+
+async def test_checkouts_are_counted_once_after_the_pool_is_recreated(engine):
+    await engine.dispose()
+    before = pool_stats["checkouts"]
+    async with engine.connect() as connection:
+        await connection.execute(text("select 1"))
+    assert pool_stats["checkouts"] - before == 1
@@ -0,0 +1,92 @@
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.auth import tokens
+from src.cache.redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+CLAIMS = {"sub": "user@example.com", "uid": 7, "verified": True}
+
+
+async def test_rotation_replaces_the_refresh_token():
+    access, refresh = await tokens.start_session(CLAIMS)
+
+    outcome, pair = await tokens.rotate_session(refresh)
+    assert outcome == tokens.ROTATED
+    new_access, new_refresh = pair
+    family = tokens.decode_token(refresh, tokens.REFRESH)["fam"]
+    assert tokens.decode_token(new_refresh, tokens.REFRESH)["fam"] == family
+    assert await tokens.verify_token(new_access, tokens.ACCESS) is not None
+    assert await tokens.verify_token(access, tokens.ACCESS) is not None
+
+    outcome, pair = await tokens.rotate_session(new_refresh)
+    assert outcome == tokens.ROTATED
+
+
+async def test_reuse_revokes_the_whole_family():
+    access, refresh = await tokens.start_session(CLAIMS)
+    _, (new_access, new_refresh) = await tokens.rotate_session(refresh)
+    reuse = tokens.token_stats["refresh_reuse"]
+
+    outcome, pair = await tokens.rotate_session(refresh)
+    assert (outcome, pair) == (tokens.REUSED, None)
+    assert tokens.token_stats["refresh_reuse"] == reuse + 1
+
+    # The legitimate holder's tokens die with the family.
+    assert await tokens.rotate_session(new_refresh) == (tokens.UNKNOWN_FAMILY, None)
+    assert await tokens.verify_token(access, tokens.ACCESS) is None
+    assert await tokens.verify_token(new_access, tokens.ACCESS) is None
+
+
+async def test_sessions_are_independent():
+    access, refresh = await tokens.start_session(CLAIMS)
+    other_access, other_refresh = await tokens.start_session(CLAIMS)
+    await tokens.rotate_session(refresh)
+    await tokens.rotate_session(refresh)
+
+    assert await tokens.verify_token(other_access, tokens.ACCESS) is not None
+    assert (await tokens.rotate_session(other_refresh))[0] == tokens.ROTATED
+
+
+async def test_end_session_invalidates_family():
+    access, refresh = await tokens.start_session(CLAIMS)
+    await tokens.end_session(access, tokens.ACCESS)
+
+    assert await tokens.verify_token(access, tokens.ACCESS) is None
+    assert await tokens.rotate_session(refresh) == (tokens.UNKNOWN_FAMILY, None)
+
+
+async def test_refresh_token_without_family_is_honoured_once():
+    refresh = tokens.issue_token(CLAIMS, tokens.REFRESH)
+
+    outcome, (access, new_refresh) = await tokens.rotate_session(refresh)
+    assert outcome == tokens.ROTATED
+    assert tokens.decode_token(new_refresh, tokens.REFRESH)["fam"]
+    assert await tokens.rotate_session(refresh) == (tokens.UNKNOWN_FAMILY, None)
+
+
+async def test_start_session_without_redis_issues_pair_without_family(monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise RedisConnectionError("down")
+
+    monkeypatch.setattr(redis_client, "set", unavailable)
+    errors = tokens.token_stats["session_errors"]
+
+    access, refresh = await tokens.start_session(CLAIMS)
+    assert tokens.token_stats["session_errors"] == errors + 1
+    assert "fam" not in tokens.decode_token(refresh, tokens.REFRESH)
+    assert await tokens.verify_token(access, tokens.ACCESS) is not None
+    assert await tokens.verify_token(refresh, tokens.REFRESH) is not None
+
+
+async def test_refresh_endpoint_reports_reuse(client):
+    _, refresh = await tokens.start_session(CLAIMS)
+
+    response = await client.post("/auth/refresh", json={"refresh_token": refresh})
+    assert response.status_code == 200
+    assert response.json()["refresh_token"] != refresh
+
+    response = await client.post("/auth/refresh", json={"refresh_token": refresh})
+    assert response.status_code == 401
+    assert "reuse" in response.json()["detail"]
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from src.cache.redis_client import redis_client
+from src.cache.tiered import cached, invalidate, tiered_cache
+
+pytestmark = pytest.mark.anyio
+
+
+def racing_loader(namespace: str):
+    # A cached loader that reads the "database" and then waits, so an invalidation can land
+    # between the read and the cache write.
+    state = {"row": "old", "loaded": asyncio.Event(), "release": asyncio.Event()}
+
+    @cached(namespace, key=("item_id",), dump=json.dumps, load=json.loads)
+    async def load_item(item_id):
+        value = {"id": item_id, "row": state["row"]}
+        state["loaded"].set()
+        await state["release"].wait()
+        return value
+
+    return load_item, state
+
+
+async def test_invalidation_during_load_is_not_overwritten():
+    load_item, state = racing_loader("race-local")
+    pending = asyncio.create_task(load_item(1))
+    await state["loaded"].wait()
+    state["row"] = "new"
+    await invalidate("race-local", 1)
+    state["release"].set()
+
+    assert (await pending)["row"] == "old"
+    assert await redis_client.get("tc:race-local:1") is None
+    assert (await load_item(1))["row"] == "new"
+    assert json.loads(await redis_client.get("tc:race-local:1"))["row"] == "new"
+    assert tiered_cache.stats()["race-local"]["stale_writes"] == 1
+
+
+async def test_invalidation_by_another_worker_during_load_is_not_overwritten():
+    load_item, state = racing_loader("race-remote")
+    pending = asyncio.create_task(load_item(1))
+    await state["loaded"].wait()
+    # Only the shared generation changes; this worker's local epoch does not see it.
+    await redis_client.incr("tcgen:race-remote:1")
+    state["row"] = "new"
+    state["release"].set()
+
+    assert (await pending)["row"] == "old"
+    assert await redis_client.get("tc:race-remote:1") is None
+    assert (await load_item(1))["row"] == "new"
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.auth import tokens
+from src.cache.redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+CLAIMS = {"sub": "user@example.com", "uid": 7, "verified": True}
+
+
+async def test_issue_token_sets_type_id_and_issue_time():
+    before = int(time.time() * 1000)
+    token = tokens.issue_token(CLAIMS, tokens.ACCESS)
+    claims = tokens.decode_token(token, tokens.ACCESS)
+
+    assert claims["sub"] == "user@example.com"
+    assert claims["typ"] == tokens.ACCESS
+    assert claims["jti"]
+    assert before <= claims["iat_ms"] <= int(time.time() * 1000)
+    assert claims["iat"] == claims["iat_ms"] // 1000
+    assert tokens.issue_token(CLAIMS, tokens.ACCESS) != token
+
+
+async def test_decode_token_rejects_wrong_type_and_garbage():
+    access = tokens.issue_token(CLAIMS, tokens.ACCESS)
+    assert tokens.decode_token(access, tokens.REFRESH) is None
+    assert tokens.decode_token("not-a-token", tokens.ACCESS) is None
+
+
+async def test_revoked_token_is_rejected():
+    token = tokens.issue_token(CLAIMS, tokens.ACCESS)
+    other = tokens.issue_token(CLAIMS, tokens.ACCESS)
+    assert await tokens.verify_token(token, tokens.ACCESS) is not None
+
+    assert await tokens.revoke_token(token, tokens.ACCESS)
+    assert await tokens.verify_token(token, tokens.ACCESS) is None
+    assert await tokens.verify_token(other, tokens.ACCESS) is not None
+
+
+async def test_user_cutoff_separates_tokens_within_one_second():
+    await redis_client.set("revoked:user:7", "1700000000.200")
+
+    before = {"uid": 7, "iat": 1700000000, "iat_ms": 1700000000100}
+    after = {"uid": 7, "iat": 1700000000, "iat_ms": 1700000000500}
+    assert await tokens.is_revoked(before)
+    assert not await tokens.is_revoked(after)
+    # Tokens without iat_ms are treated as issued at the start of their second.
+    assert await tokens.is_revoked({"uid": 7, "iat": 1700000000})
+    assert not await tokens.is_revoked({"uid": 8, "iat": 1700000000})
+
+
+async def test_integer_cutoff_from_before_millisecond_precision():
+    await redis_client.set("revoked:user:7", "1700000000")
+    assert await tokens.is_revoked({"uid": 7, "iat": 1700000000, "iat_ms": 1700000000000})
+    assert not await tokens.is_revoked({"uid": 7, "iat": 1700000000, "iat_ms": 1700000000001})
+
+
+async def test_login_right_after_revocation_is_valid():
+    old = tokens.issue_token(CLAIMS, tokens.ACCESS)
+    time.sleep(0.002)
+    await tokens.revoke_user_tokens(7)
+    time.sleep(0.002)
+    new = tokens.issue_token(CLAIMS, tokens.ACCESS)
+
+    assert await tokens.verify_token(old, tokens.ACCESS) is None
+    assert await tokens.verify_token(new, tokens.ACCESS) is not None
+
+
+async def test_revocation_check_fails_open(monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise RedisConnectionError("down")
+
+    monkeypatch.setattr(redis_client, "mget", unavailable)
+    errors = tokens.token_stats["revocation_errors"]
+    token = tokens.issue_token(CLAIMS, tokens.ACCESS)
+
+    assert await tokens.verify_token(token, tokens.ACCESS) is not None
+    assert tokens.token_stats["revocation_errors"] == errors + 1
+
+
+async def test_logout_revokes_access_and_refresh_tokens(client):
+    access, refresh = await tokens.start_session(CLAIMS)
+
+    response = await client.post("/auth/logout", json={"refresh_token": refresh},
+                                 headers={"Authorization": f"Bearer {access}"})
+    assert response.status_code == 200
+
+    assert await tokens.verify_token(access, tokens.ACCESS) is None
+    assert await tokens.verify_token(refresh, tokens.REFRESH) is None
+    response = await client.post("/auth/logout", headers={"Authorization": f"Bearer {access}"})
+    assert response.status_code == 401
+
+
+async def test_reset_password_form_checks_revocation(db, client):
+    response = await client.post("/auth/register", json={"email": "ann@example.com", "password": "old-pass-123"})
+    claims = {"sub": "ann@example.com", "uid": response.json()["id"]}
+
+    logged_out = tokens.issue_token(claims, tokens.ACCESS)
+    await tokens.revoke_token(logged_out, tokens.ACCESS)
+    response = await client.post("/auth/reset-password", data={"token": logged_out, "new_password": "new-pass-123"})
+    assert response.status_code == 400
+
+    token = tokens.issue_token(claims, tokens.ACCESS)
+    response = await client.post("/auth/reset-password", data={"token": token, "new_password": "new-pass-123"})
+    assert response.status_code == 200
+    # The reset revoked every earlier token of the user, this one included.
+    response = await client.post("/auth/reset-password", data={"token": token, "new_password": "other-pass-123"})
+    assert response.status_code == 400
@@ -0,0 +1,41 @@
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.cache.redis_client import redis_client
+from src.database.db import after_commit, commit
+from src.services import email
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_failing_callback_does_not_skip_the_others(db):
+    ran = []
+
+    async def broken():
+        raise RedisConnectionError("down")
+
+    async def record(name):
+        ran.append(name)
+
+    after_commit(db, broken)
+    after_commit(db, record, "after")
+    await commit(db)
+    assert ran == ["after"]
+
+
+async def test_register_sends_directly_when_the_queue_is_down(db, client, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise RedisConnectionError("down")
+
+    sent = []
+
+    async def send_directly(message):
+        sent.append(message["To"])
+
+    monkeypatch.setattr(redis_client, "lpush", unavailable)
+    monkeypatch.setattr(email, "send_directly", send_directly)
+
+    body = {"username": "ann", "email": "ann@example.com", "password": "secret-pass-123"}
+    response = await client.post("/auth/register", json=body)
+    assert response.status_code == 201
+    assert sent == ["ann@example.com"]
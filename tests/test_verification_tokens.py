@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from src.cache.redis_client import redis_client
+from src.database.db import AsyncSessionLocal, commit, rollback
+from src.services.verification_tokens import RedisTokenStore
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def store():
+    return RedisTokenStore(redis_client)
+
+
+async def test_concurrent_redemptions_claim_a_token_once(db, store):
+    await store.save(db, 7, "tok", "password_reset")
+
+    async def redeem():
+        async with AsyncSessionLocal() as session:
+            user_id = await store.consume(session, "tok", "password_reset")
+            await commit(session)
+            return user_id
+
+    assert sorted(await asyncio.gather(redeem(), redeem()), key=bool) == [None, 7]
+    assert await store.consume(db, "tok", "password_reset") is None
+
+
+async def test_rolled_back_redemption_puts_the_token_back(db, store):
+    await store.save(db, 7, "tok", "email_verification")
+
+    assert await store.consume(db, "tok", "email_verification") == 7
+    assert await redis_client.get("vtoken:email_verification:tok") is None
+    await rollback(db)
+    assert 0 < await redis_client.pttl("vtoken:email_verification:tok")
+
+    assert await store.consume(db, "tok", "email_verification") == 7
+    await commit(db)
+    assert await redis_client.exists("vtoken:email_verification:tok") == 0